@@ -1,5 +1,8 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog
+from collections import OrderedDict
+
+from spatial import SpatialGrid
 
 # === Базовый класс фигуры ===
 class BaseShape:
@@ -55,6 +58,96 @@ class Shape17(BaseShape):
         half = self.size / 2.0
         return (self.x - half, self.y - half, self.x + half, self.y + half)
 
+    def sprite_key(self):
+        """Параметры, от которых зависит вид фигуры (но не положение)"""
+        return (self.size, self.border_width, self.color)
+
+    def render_sprite(self):
+        """
+        Фигура в изображении PIL (RGBA, прозрачный фон) с центром в середине.
+        Tk рисует контур по центру линии, PIL - внутрь рамки, поэтому рамки
+        расширены на половину толщины.
+        """
+        from PIL import Image, ImageDraw
+
+        half_width = self.border_width / 2.0
+        extent = int(self.size + self.border_width) + 3
+        center = extent / 2.0
+        image = Image.new("RGBA", (extent, extent), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+
+        half = self.size / 2.0 + half_width
+        draw.rectangle((center - half, center - half, center + half, center + half),
+                       outline=self.color, width=self.border_width)
+        r = self.size * 0.72 / 2.0 + half_width
+        draw.ellipse((center - r, center - r, center + r, center + r),
+                     outline=self.color, width=self.border_width)
+        return image
+
+
+# === Штампы: растровые спрайты и слои-изображения вместо тысяч элементов canvas ===
+class SpriteCache:
+    """LRU-кэш спрайтов фигур: (размер, толщина, цвет) -> PhotoImage"""
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.sprites = OrderedDict()
+
+    def get(self, shape):
+        from PIL import ImageTk
+
+        key = shape.sprite_key()
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+        sprite = self.sprites[key] = ImageTk.PhotoImage(shape.render_sprite())
+        if len(self.sprites) > self.capacity:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    def clear(self):
+        self.sprites.clear()
+
+
+class StampLayer:
+    """
+    Растровый слой размером с холст - на canvas это один элемент-изображение.
+    Штамп копируется в него из спрайта средствами Tk (photo copy с наложением
+    по альфа-каналу), поэтому время кадра не зависит от числа штампов.
+    Слой создается поверх уже нарисованного, так что серия штампов лежит
+    над предыдущими фигурами и под следующими.
+    """
+
+    def __init__(self, canvas, width, height, sprites):
+        self.canvas = canvas
+        self.sprites = sprites
+        # Размер задан явно: photo copy за правый/нижний край не расширяет изображение
+        self.photo = tk.PhotoImage(width=width, height=height)
+        self.item = canvas.create_image(0, 0, image=self.photo, anchor="nw", tags="stamps")
+
+    def stamp(self, shape):
+        sprite = self.sprites.get(shape)
+        width, height = sprite.width(), sprite.height()
+        x = int(round(shape.x - width / 2.0))
+        y = int(round(shape.y - height / 2.0))
+        # Tk не принимает отрицательное -to: часть спрайта за левым/верхним краем отрезаем через -from
+        from_x, from_y = max(0, -x), max(0, -y)
+        if from_x >= width or from_y >= height:
+            return
+        self.photo.tk.call(self.photo.name, "copy", str(sprite),
+                           "-from", from_x, from_y, width, height,
+                           "-to", x + from_x, y + from_y,
+                           "-compositingrule", "overlay")
+
+
+# === Отрисовка без окна Tk (в изображение PIL) ===
+def render_shapes(shapes, width=600, height=420, scale=1.0, background="white"):
+    # Модуль offscreen (PIL) нужен только для экспорта, поэтому подключаем его здесь
+    from offscreen import render_offscreen
+
+    return render_offscreen(shapes, width, height, scale, background)
+
 
 # === Простое приложение Painter с выбором параметров ===
 class PainterApp:
@@ -65,6 +158,19 @@ class PainterApp:
         self.canvas = tk.Canvas(root, width=600, height=420, bg="white")
         self.canvas.grid(row=0, column=0, columnspan=4, padx=10, pady=10)
 
+        # Нарисованные фигуры и индекс их областей (get_region)
+        self.shapes = []
+        self.shape_index = SpatialGrid(cell_size=64)
+        self.selection_start = None
+
+        # Режим штампа: фигуры - копии закэшированных спрайтов в растровых слоях
+        self.stamp_mode = tk.BooleanVar(value=False)
+        self.sprite_cache = SpriteCache()
+        self.stamp_layers = []  # по слою на каждую серию штампов подряд (ссылки держат PhotoImage)
+        self.stamp_layer = None  # слой текущей серии
+        self.last_stamp = None
+        self.stamp_spacing = 4  # минимальный шаг между штампами при протяжке, px
+
         # Параметры
         self.size_var = tk.IntVar(value=140)
         self.width_var = tk.IntVar(value=6)
@@ -91,27 +197,101 @@ class PainterApp:
         self.clear_btn = ttk.Button(btn_frame, text="Очистить", command=self.clear_canvas)
         self.clear_btn.pack(side="left", padx=6)
 
+        self.export_btn = ttk.Button(btn_frame, text="Сохранить в BMP", command=self.export_image)
+        self.export_btn.pack(side="left", padx=6)
+
+        ttk.Checkbutton(btn_frame, text="Режим штампа", variable=self.stamp_mode).pack(side="left", padx=6)
+
         # Рисуем по клику мыши в позиции клика
         self.canvas.bind("<Button-1>", self.on_canvas_click)
-        ttk.Label(root, text="Клик на холст — нарисовать в позиции клика").grid(row=4, column=0, columnspan=4, pady=(0,8))
+        # Протяжка левой кнопкой - рисование фигурами вдоль пути
+        self.canvas.bind("<B1-Motion>", self.on_canvas_drag)
+        # Правая кнопка: клик - выбрать фигуру, протяжка - выделить рамкой
+        self.canvas.bind("<Button-3>", self.on_selection_start)
+        self.canvas.bind("<B3-Motion>", self.on_selection_drag)
+        self.canvas.bind("<ButtonRelease-3>", self.on_selection_end)
+        ttk.Label(root, text="Клик или протяжка — нарисовать фигуры, правая кнопка — выбрать фигуры").grid(row=4, column=0, columnspan=4, pady=(0,8))
 
         # Отрисуем пример в центре
         self.draw_shape()
 
     def clear_canvas(self):
         self.canvas.delete("all")
+        self.shapes.clear()
+        self.shape_index = SpatialGrid(cell_size=64)
+        self.stamp_layers.clear()
+        self.stamp_layer = None
+
+    def export_image(self):
+        path = filedialog.asksaveasfilename(defaultextension=".bmp", filetypes=[("BMP", "*.bmp"), ("PNG", "*.png")])
+        if path:
+            render_shapes(self.shapes, self.canvas.winfo_width(), self.canvas.winfo_height()).save(path)
+
+    def add_shape(self, shape):
+        """Нарисовать фигуру (векторно или штампом) и занести ее область в индекс"""
+        if self.stamp_mode.get():
+            self.stamp_shape(shape)
+        else:
+            shape.show(self.canvas)
+            # Векторная фигура легла поверх слоя штампов: следующие штампы - в новый слой выше нее
+            self.stamp_layer = None
+        self.shapes.append(shape)
+        self.shape_index.insert(shape, shape.get_region())
 
     def draw_shape(self):
         self.clear_canvas()
         cx = self.canvas.winfo_width() // 2
         cy = self.canvas.winfo_height() // 2
         shape = Shape17(cx, cy, size=self.size_var.get(), border_width=self.width_var.get(), color=self.color_var.get())
-        shape.show(self.canvas)
+        self.add_shape(shape)
+
+    def stamp_shape(self, shape):
+        """Скопировать спрайт фигуры в слой текущей серии штампов (слой создается при первом штампе серии)"""
+        if self.stamp_layer is None:
+            width = int(self.canvas.cget("width"))
+            height = int(self.canvas.cget("height"))
+            self.stamp_layer = StampLayer(self.canvas, width, height, self.sprite_cache)
+            self.stamp_layers.append(self.stamp_layer)
+        self.stamp_layer.stamp(shape)
 
     def on_canvas_click(self, event):
         # рисуем в точке клика текущую фигуру
         shape = Shape17(event.x, event.y, size=self.size_var.get(), border_width=self.width_var.get(), color=self.color_var.get())
-        shape.show(self.canvas)
+        self.add_shape(shape)
+        self.last_stamp = (event.x, event.y)
+
+    def on_canvas_drag(self, event):
+        # при протяжке - новая фигура, если курсор отошел от предыдущей хотя бы на stamp_spacing
+        if self.last_stamp is not None:
+            dx, dy = event.x - self.last_stamp[0], event.y - self.last_stamp[1]
+            if dx * dx + dy * dy < self.stamp_spacing * self.stamp_spacing:
+                return
+        self.on_canvas_click(event)
+
+    def on_selection_start(self, event):
+        self.selection_start = (event.x, event.y)
+
+    def on_selection_drag(self, event):
+        x0, y0 = self.selection_start
+        self.canvas.delete("selection_rect")
+        self.canvas.create_rectangle(x0, y0, event.x, event.y, outline="gray", dash=(3, 3), tags="selection_rect")
+
+    def on_selection_end(self, event):
+        x0, y0 = self.selection_start
+        self.canvas.delete("selection_rect")
+        rect = (min(x0, event.x), min(y0, event.y), max(x0, event.x), max(y0, event.y))
+
+        if rect[2] - rect[0] < 3 and rect[3] - rect[1] < 3:
+            # Простой клик - верхняя (последняя нарисованная) фигура под курсором
+            hits = self.shape_index.query_point(event.x, event.y)
+            selected = [self.shape_index.topmost(hits)] if hits else []
+        else:
+            selected = self.shape_index.query_rect(rect)
+
+        # Подсвечиваем области выбранных фигур
+        self.canvas.delete("selection")
+        for shape in selected:
+            self.canvas.create_rectangle(*shape.get_region(), outline="#1E88E5", dash=(4, 2), tags="selection")
 
 
 if __name__ == "__main__":
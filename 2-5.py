@@ -1,70 +1,252 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog
 import math
-
-
-class Point:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-
-
-class SplineCurve:
+import numpy as np
+
+import canvas_scene
+from canvas_scene import Viewport, ViewportCanvas
+from geometry import Point, PointArray
+from history import History
+from scheduler import BackgroundWorker, RedrawScheduler
+from tessellation import flatten_cubic_bezier
+from arclength import ArcLengthMixin
+
+
+# Кэш базисных матриц кардинального сплайна: ключ (segments, tension)
+_CATMULL_ROM_BASIS_CACHE = {}
+_CATMULL_ROM_BASIS_CACHE_SIZE = 32
+
+
+def catmull_rom_basis(segments, tension=0.5):
+    """
+    Кэшированная матрица (segments + 1) x 4 весов кардинального сплайна.
+    При tension = 0.5 совпадает с классическим сплайном Катмулла-Рома;
+    большее натяжение укорачивает касательные и делает кривую "туже".
+    """
+    key = (segments, round(tension, 6))
+    basis = _CATMULL_ROM_BASIS_CACHE.get(key)
+    if basis is not None:
+        return basis
+
+    s = 1.0 - tension  # множитель касательных (0.5 для Катмулла-Рома)
+    matrix = np.array([
+        [-s, 2 - s, s - 2, s],
+        [2 * s, s - 3, 3 - 2 * s, -s],
+        [-s, 0, s, 0],
+        [0, 1, 0, 0],
+    ])
+    t = np.linspace(0.0, 1.0, segments + 1)
+    powers = np.stack([t ** 3, t ** 2, t, np.ones_like(t)], axis=1)
+
+    basis = powers @ matrix
+    basis.setflags(write=False)
+
+    # Ползунок натяжения выдает много разных значений - храним только последние
+    if len(_CATMULL_ROM_BASIS_CACHE) >= _CATMULL_ROM_BASIS_CACHE_SIZE:
+        _CATMULL_ROM_BASIS_CACHE.pop(next(iter(_CATMULL_ROM_BASIS_CACHE)))
+    _CATMULL_ROM_BASIS_CACHE[key] = basis
+    return basis
+
+
+def tessellate_catmull_rom(points, segments=20, tension=0.5):
+    """
+    Разбиение всего сплайна на отрезки за один вызов NumPy.
+    points - массив (N, 2) контрольных точек, N >= 4.
+    Возвращает плоский список [x0, y0, x1, y1, ...] для canvas.create_line.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) < 4:
+        return points.ravel().tolist()
+
+    # Окна из четырех соседних точек для каждого сегмента: (N - 3, 4, 2)
+    windows = points[np.arange(len(points) - 3)[:, None] + np.arange(4)]
+    # (S, 4) @ (N - 3, 4, 2) -> (N - 3, S, 2)
+    curve = catmull_rom_basis(segments, tension) @ windows
+
+    buffer = np.empty(2 * (curve.shape[0] * curve.shape[1] + 2))
+    buffer[:2] = points[0]
+    buffer[2:-2] = curve.ravel()
+    buffer[-2:] = points[-1]
+    return buffer.tolist()
+
+
+def flatten_catmull_rom(points, tension=0.5, tolerance=0.5):
+    """
+    Адаптивное разбиение сплайна Катмулла-Рома: каждый сегмент P1-P2 переводится
+    в кубическую кривую Безье (касательные s * (P2 - P0) и s * (P3 - P1)),
+    которая затем разбивается с допуском tolerance.
+    Возвращает плоский список [x0, y0, x1, y1, ...] той же формы, что и tessellate_catmull_rom.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) < 4:
+        return points.ravel().tolist()
+
+    s = 1.0 - tension
+    p0, p1, p2, p3 = points[:-3], points[1:-2], points[2:-1], points[3:]
+    quads = np.stack([p1, p1 + s * (p2 - p0) / 3, p2 - s * (p3 - p1) / 3, p2], axis=1)
+
+    # Соседние сегменты имеют общие концы - повторы убираем
+    curves = flatten_cubic_bezier(quads, tolerance)
+    curve = np.concatenate([points[:1]] + [curves[0]] + [piece[1:] for piece in curves[1:]] + [points[-1:]])
+    return curve.ravel().tolist()
+
+
+class SceneLayer(canvas_scene.SceneLayer):
+    # Порядок слоев снизу вверх
+    LAYERS = ("grid", "control_lines", "helper_lines", "curve", "points")
+
+
+class SplineCurve(ArcLengthMixin):
     def __init__(self, color="red"):
-        self.control_points = []
+        self.control_points = PointArray()
         self.color = color
         self.show_control_lines = True
         self.show_points = True
         self.line_width = 3
         self.tension = 0.5
-        self.additional_points = []  # Дополнительные промежуточные точки
+        self.segments = 20  # Количество сегментов между точками
+        # Допуск адаптивного разбиения в пикселях экрана (None - равномерно по segments)
+        self.tolerance = 0.5
+        self.view_scale = 1.0  # Масштаб отображения: пикселей экрана на единицу сцены
+        self.detail = Viewport.FULL  # Уровень детализации (см. Viewport.detail)
+        self.revision = 0  # Увеличивается при каждом изменении сплайна
+        self.geometry_version = 0  # Увеличивается при изменении контрольных точек
+        self.curve_cache = None  # (ключ, буфер координат кривой) - см. curve_key
+        self.arc_length_cache = None  # ((geometry_version, натяжение), ArcLengthTable)
+        self.additional_points = PointArray()  # Дополнительные промежуточные точки
+        # Вызывается с изменением числа дополнительных точек (используется SplineManager)
+        self.on_additional_points_changed = None
 
     def add_control_point(self, point):
         self.control_points.append(point)
-        self.generate_additional_points()
+        # Новый сегмент добавляет ровно две промежуточные точки
+        if len(self.control_points) >= 2:
+            self.additional_points.extend(self.segment_additional_points(self.control_points[-2], point))
+            self.notify_additional_points_changed(2)
+        self.geometry_version += 1
+        self.revision += 1
 
     def remove_last_control_point(self):
         if self.control_points:
             point = self.control_points.pop()
-            self.generate_additional_points()
+            # Вместе с последним сегментом уходят две его промежуточные точки
+            if self.control_points:
+                del self.additional_points[-2:]
+                self.notify_additional_points_changed(-2)
+            self.geometry_version += 1
+            self.revision += 1
             return point
         return None
 
     def clear_control_points(self):
+        removed = len(self.additional_points)
         self.control_points.clear()
         self.additional_points.clear()
+        self.notify_additional_points_changed(-removed)
+        self.geometry_version += 1
+        self.revision += 1
 
     def set_tension(self, value):
         self.tension = max(0.1, min(0.9, float(value)))
         self.generate_additional_points()
+        self.revision += 1
 
-    def generate_additional_points(self):
-        """Генерирует 2 промежуточные точки на каждом сегменте между контрольными точками"""
-        self.additional_points = []
-
-        if len(self.control_points) < 2:
-            return
-
-        for i in range(len(self.control_points) - 1):
-            p1 = self.control_points[i]
-            p2 = self.control_points[i + 1]
+    def toggle_control_lines(self):
+        self.show_control_lines = not self.show_control_lines
+        self.revision += 1
 
-            # Вычисляем вектор направления
-            dx = p2.x - p1.x
-            dy = p2.y - p1.y
+    def toggle_points(self):
+        self.show_points = not self.show_points
+        self.revision += 1
+
+    def notify_additional_points_changed(self, delta):
+        if delta and self.on_additional_points_changed:
+            self.on_additional_points_changed(delta)
+
+    @staticmethod
+    def segment_additional_points(p1, p2):
+        """Две промежуточные точки сегмента p1-p2"""
+        # Вычисляем вектор направления
+        dx = p2.x - p1.x
+        dy = p2.y - p1.y
+
+        # Две промежуточные точки на расстоянии 1/3 и 2/3 от p1 до p2
+        add_point1 = Point(
+            p1.x + dx * 0.33,
+            p1.y + dy * 0.33
+        )
 
-            # Две промежуточные точки на расстоянии 1/3 и 2/3 от p1 до p2
-            add_point1 = Point(
-                p1.x + dx * 0.33,
-                p1.y + dy * 0.33
-            )
+        add_point2 = Point(
+            p1.x + dx * 0.67,
+            p1.y + dy * 0.67
+        )
 
-            add_point2 = Point(
-                p1.x + dx * 0.67,
-                p1.y + dy * 0.67
-            )
+        return add_point1, add_point2
 
-            self.additional_points.extend([add_point1, add_point2])
+    def generate_additional_points(self):
+        """
+        Полностью перестраивает промежуточные точки (2 на каждом сегменте).
+        Добавление и удаление точек обновляют список инкрементально, поэтому
+        полный пересчет нужен только при смене натяжения.
+        """
+        self.set_additional_coords(self.additional_point_coords(self.control_points.array()))
+
+    @staticmethod
+    def additional_point_coords(points):
+        """Промежуточные точки всех сегментов (массив (2 * (N - 1), 2)) одной операцией над массивом"""
+        starts = points[:-1]
+        deltas = np.diff(points, axis=0)
+        coords = np.empty((2 * len(deltas), 2))
+        coords[0::2] = starts + deltas * 0.33
+        coords[1::2] = starts + deltas * 0.67
+        return coords
+
+    def set_additional_coords(self, coords):
+        previous_count = len(self.additional_points)
+        self.additional_points.set_array(coords)
+        self.notify_additional_points_changed(len(self.additional_points) - previous_count)
+
+    def curve_key(self, tension=None):
+        """Все, от чего зависит разбиение кривой (для проверки кэша)"""
+        tension = self.tension if tension is None else tension
+        return self.geometry_version, tension, self.segments, self.tolerance, self.view_scale
+
+    def rebuild_job(self, tension):
+        """
+        Задача полного пересчета сплайна для BackgroundWorker: (функция, аргументы).
+        Аргументы - копии данных, поэтому пересчет безопасен в другом потоке.
+        """
+        tension = max(0.1, min(0.9, float(tension)))
+        return self.compute_rebuild, (self.control_array().copy(), tension, self.segments,
+                                      self.tolerance, self.view_scale, self.curve_key(tension))
+
+    @staticmethod
+    def curve_coords(points, tension, segments, tolerance, view_scale):
+        """Разбиение кривой по снимку данных: адаптивное или по равномерной сетке"""
+        if tolerance:
+            return flatten_catmull_rom(points, tension, tolerance / view_scale)
+        return tessellate_catmull_rom(points, segments, tension)
+
+    @staticmethod
+    def compute_rebuild(points, tension, segments, tolerance, view_scale, key):
+        """Промежуточные точки и разбиение кривой по снимку данных (без обращения к сплайну)"""
+        additional = SplineCurve.additional_point_coords(points)
+        curve = SplineCurve.curve_coords(points, tension, segments, tolerance, view_scale)
+        return key, tension, additional, curve
+
+    def apply_rebuild(self, result):
+        """
+        Принять результат compute_rebuild (в потоке Tk). Если сплайн успел
+        измениться, пока шел пересчет, натяжение применяется обычным путем.
+        """
+        key, tension, additional, curve = result
+        if key[0] != self.geometry_version:
+            self.set_tension(tension)
+            return
+        self.tension = tension
+        self.set_additional_coords(additional)
+        self.curve_cache = (key, curve)
+        self.revision += 1
 
     def catmull_rom_point(self, t, p0, p1, p2, p3):
         """Катмулл-Ром сплайн для плавной интерполяции"""
@@ -83,15 +265,67 @@ class SplineCurve:
                    (-p0.y + 3 * p1.y - 3 * p2.y + p3.y) * t3)
         )
 
+    def control_array(self):
+        """Контрольные точки в виде массива (N, 2)"""
+        return self.control_points.array()
+
+    def curve_quads(self):
+        """
+        Кривая в виде кубических сегментов Безье (k, 4, 2) - так же, как она рисуется:
+        отрезок, квадратичная кривая для трех точек или Катмулл-Ром с прямыми концами
+        """
+        points = self.control_array()
+
+        def line(a, b):
+            # Отрезок - кубическая кривая с равномерно расставленными контрольными точками
+            return a + (b - a) * np.linspace(0.0, 1.0, 4)[:, None]
+
+        if len(points) >= 4:
+            s = 1.0 - self.tension
+            p0, p1, p2, p3 = points[:-3], points[1:-2], points[2:-1], points[3:]
+            quads = np.stack([p1, p1 + s * (p2 - p0) / 3, p2 - s * (p3 - p1) / 3, p2], axis=1)
+            # Ломаная кривой начинается в P0 и заканчивается в последней точке (см. tessellate_catmull_rom)
+            return np.concatenate([line(points[0], points[1])[None], quads, line(points[-2], points[-1])[None]])
+        if len(points) == 3:
+            # Квадратичная кривая с P2 в роли контрольной точки, записанная как кубическая
+            p1, p2, p3 = points
+            return np.array([[p1, p1 + 2 * (p2 - p1) / 3, p3 + 2 * (p2 - p3) / 3, p3]])
+        if len(points) == 2:
+            return line(points[0], points[1])[None]
+        return np.empty((0, 4, 2))
+
+    def get_bounds(self):
+        """Границы контрольных точек (min_x, min_y, max_x, max_y)"""
+        if not self.control_points:
+            return 0, 0, 0, 0
+        coords = self.control_array()
+        return tuple(coords.min(axis=0).tolist() + coords.max(axis=0).tolist())
+
+    def set_view(self, view_scale, detail):
+        """Установить масштаб отображения и уровень детализации (ревизия меняется только при изменении)"""
+        if (view_scale, detail) != (self.view_scale, self.detail):
+            self.view_scale = view_scale
+            self.detail = detail
+            self.revision += 1
+
+    def tessellate(self, tolerance=None):
+        """Плоский буфер координат кривой с учетом натяжения"""
+        if tolerance is None:
+            # Основное разбиение кэшируется (его же готовит фоновый пересчет)
+            key = self.curve_key()
+            if self.curve_cache is None or self.curve_cache[0] != key:
+                self.curve_cache = (key, self.curve_coords(self.control_array(), self.tension, self.segments,
+                                                           self.tolerance, self.view_scale))
+            return self.curve_cache[1]
+
+        # Допуск задан в пикселях экрана - при отдалении вершин становится меньше
+        return flatten_catmull_rom(self.control_array(), self.tension, tolerance / self.view_scale)
+
     def draw_control_lines(self, canvas):
         if len(self.control_points) < 2:
             return
 
-        points_coords = []
-        for point in self.control_points:
-            points_coords.extend([point.x, point.y])
-
-        canvas.create_line(points_coords, fill="lightgray", width=1, dash=(2, 2))
+        canvas.create_line(self.control_points.flat(), fill="lightgray", width=1, dash=(2, 2))
 
     def draw_additional_points_lines(self, canvas):
         """Рисует линии к дополнительным точкам"""
@@ -99,36 +333,51 @@ class SplineCurve:
             return
 
         # Соединяем дополнительные точки с ближайшими контрольными точками
-        for i, add_point in enumerate(self.additional_points):
-            control_point_index = i // 2  # Каждые 2 доп. точки относятся к одному сегменту
-            if control_point_index < len(self.control_points) - 1:
-                p1 = self.control_points[control_point_index]
-                p2 = self.control_points[control_point_index + 1]
-
-                # Рисуем пунктирные линии к обоим контрольным точкам сегмента
-                canvas.create_line(add_point.x, add_point.y, p1.x, p1.y,
-                                   fill="#FFA000", width=1, dash=(1, 2))
-                canvas.create_line(add_point.x, add_point.y, p2.x, p2.y,
-                                   fill="#FFA000", width=1, dash=(1, 2))
+        for i in range(len(self.additional_points)):
+            self.draw_additional_point_lines(canvas, i)
+
+    def draw_additional_point_lines(self, canvas, i):
+        """Рисует линии от i-й дополнительной точки к контрольным точкам ее сегмента"""
+        add_point = self.additional_points[i]
+        control_point_index = i // 2  # Каждые 2 доп. точки относятся к одному сегменту
+        if control_point_index < len(self.control_points) - 1:
+            p1 = self.control_points[control_point_index]
+            p2 = self.control_points[control_point_index + 1]
+
+            # Рисуем пунктирные линии к обоим контрольным точкам сегмента
+            canvas.create_line(add_point.x, add_point.y, p1.x, p1.y,
+                               fill="#FFA000", width=1, dash=(1, 2))
+            canvas.create_line(add_point.x, add_point.y, p2.x, p2.y,
+                               fill="#FFA000", width=1, dash=(1, 2))
 
     def draw_control_points(self, canvas):
-        for i, point in enumerate(self.control_points):
-            # Рисуем контрольные точки
-            canvas.create_oval(point.x - 4, point.y - 4, point.x + 4, point.y + 4,
-                               fill="#4CAF50", outline="#2E7D32", width=2)
+        for i in range(len(self.control_points)):
+            self.draw_control_point(canvas, i)
 
-            # Номера точек
+    def draw_control_point(self, canvas, i):
+        point = self.control_points[i]
+        # Рисуем контрольные точки
+        canvas.create_oval(point.x - 4, point.y - 4, point.x + 4, point.y + 4,
+                           fill="#4CAF50", outline="#2E7D32", width=2)
+
+        # Номера точек (при отдалении скрываются)
+        if self.detail == Viewport.FULL:
             canvas.create_text(point.x, point.y - 15, text=str(i + 1),
                                fill="#2E7D32", font=("Arial", 9, "bold"))
 
     def draw_additional_points(self, canvas):
         """Рисует дополнительные промежуточные точки"""
-        for i, point in enumerate(self.additional_points):
-            # Рисуем дополнительные точки (оранжевые)
-            canvas.create_oval(point.x - 3, point.y - 3, point.x + 3, point.y + 3,
-                               fill="#FF9800", outline="#F57C00", width=1)
+        for i in range(len(self.additional_points)):
+            self.draw_additional_point(canvas, i)
+
+    def draw_additional_point(self, canvas, i):
+        point = self.additional_points[i]
+        # Рисуем дополнительные точки (оранжевые)
+        canvas.create_oval(point.x - 3, point.y - 3, point.x + 3, point.y + 3,
+                           fill="#FF9800", outline="#F57C00", width=1)
 
-            # Подписываем дополнительные точки буквами
+        # Подписываем дополнительные точки буквами
+        if self.detail == Viewport.FULL:
             segment_num = i // 2 + 1  # Номер сегмента
             point_in_segment = i % 2 + 1  # 1 или 2 точка в сегменте
             label = f"{segment_num}.{point_in_segment}"
@@ -141,31 +390,12 @@ class SplineCurve:
 
         # Для Catmull-Rom сплайна нужно минимум 4 точки
         if len(self.control_points) >= 4:
-            curve_points = []
-
-            # Добавляем первую точку
-            curve_points.append(self.control_points[0].x)
-            curve_points.append(self.control_points[0].y)
-
-            # Генерируем кривую между точками
-            for i in range(len(self.control_points) - 3):
-                p0 = self.control_points[i]
-                p1 = self.control_points[i + 1]
-                p2 = self.control_points[i + 2]
-                p3 = self.control_points[i + 3]
-
-                segments = 20  # Количество сегментов между точками
-                for j in range(segments + 1):
-                    t = j / segments
-                    point = self.catmull_rom_point(t, p0, p1, p2, p3)
-                    curve_points.extend([point.x, point.y])
-
-            # Добавляем последнюю точку
-            last_point = self.control_points[-1]
-            curve_points.extend([last_point.x, last_point.y])
-
-            # Рисуем сглаженную кривую
-            canvas.create_line(curve_points, fill=self.color, width=self.line_width, smooth=True)
+            # Все сегменты считаются сразу (адаптивно или по кэшированной базисной матрице)
+            curve_points = self.tessellate()
+
+            # Адаптивная ломаная уже точна, сглаживание нужно только равномерной сетке
+            canvas.create_line(curve_points, fill=self.color, width=self.line_width,
+                               smooth=not self.tolerance)
         else:
             # Для 2-3 точек рисуем простую кривую Безье
             if len(self.control_points) == 2:
@@ -177,26 +407,58 @@ class SplineCurve:
                 canvas.create_line(p1.x, p1.y, p2.x, p2.y, p3.x, p3.y,
                                    fill=self.color, width=self.line_width, smooth=True)
 
-    def draw(self, canvas):
+    def draw_outline(self, canvas):
+        """Упрощенное изображение далекого сплайна: одна грубая ломаная"""
+        canvas.create_line(self.tessellate(Viewport.OUTLINE_TOLERANCE), fill=self.color, width=1)
+
+    def scene_parts(self):
+        """
+        Описание сплайна для SceneLayer: (ключ части, слой, сигнатура, функция рисования).
+        Сигнатура меняется только когда меняется то, что рисует часть, поэтому
+        добавление точки затрагивает лишь несколько элементов canvas.
+        """
         if not self.control_points:
             return
 
-        # Рисуем контрольные линии
-        if self.show_control_lines and len(self.control_points) >= 2:
-            self.draw_control_lines(canvas)
+        coords = self.control_points.tuples()
+        extra = self.additional_points.tuples()
+        markers = self.detail in (Viewport.FULL, Viewport.MARKERS)
 
-        # Рисуем линии к дополнительным точкам
-        self.draw_additional_points_lines(canvas)
+        # Далекий (мелкий на экране) сплайн - одна упрощенная ломаная
+        if self.detail == Viewport.OUTLINE and len(coords) >= 2:
+            yield "outline", "curve", (coords, self.tension, self.view_scale, self.color), self.draw_outline
+            return
 
-        # Рисуем саму кривую
-        self.draw_curve(canvas)
+        # Контрольные линии
+        if self.show_control_lines and len(coords) >= 2:
+            yield "control_lines", "control_lines", coords, self.draw_control_lines
 
-        # Рисуем контрольные точки
-        if self.show_points:
-            self.draw_control_points(canvas)
+        # Линии к дополнительным точкам (только вместе с маркерами точек)
+        for i, add_coord in enumerate(extra if markers else ()):
+            segment = coords[i // 2:i // 2 + 2]
+            yield (("helper", i), "helper_lines", (add_coord, segment),
+                   lambda canvas, i=i: self.draw_additional_point_lines(canvas, i))
+
+        # Сама кривая
+        quality = (self.segments, self.tolerance, self.view_scale)
+        yield ("curve", "curve", (coords, self.tension, quality, self.color, self.line_width),
+               self.draw_curve)
 
-        # Рисуем дополнительные точки
-        self.draw_additional_points(canvas)
+        # Контрольные точки
+        if self.show_points and markers:
+            for i, coord in enumerate(coords):
+                yield (("point", i), "points", (coord, self.detail),
+                       lambda canvas, i=i: self.draw_control_point(canvas, i))
+
+        # Дополнительные точки
+        for i, add_coord in enumerate(extra if markers else ()):
+            yield (("extra", i), "points", (add_coord, self.detail),
+                   lambda canvas, i=i: self.draw_additional_point(canvas, i))
+
+    def draw(self, canvas):
+        # Части рисуются в том же порядке: линии, кривая, контрольные и дополнительные точки
+        for _, _, _, draw_part in self.scene_parts():
+            draw_part(canvas)
 
 
 class SplineManager:
@@ -208,13 +470,37 @@ class SplineManager:
             "#FF9800", "#795548", "#607D8B"
         ]
         self.color_index = 0
+        # Счетчик промежуточных точек всех сплайнов (обновляется через уведомления сплайнов)
+        self.additional_point_count = 0
 
     def start_new_spline(self):
+        # Незавершенный текущий сплайн отбрасывается
         color = self.spline_colors[self.color_index % len(self.spline_colors)]
         self.color_index += 1
-        self.current_spline = SplineCurve(color=color)
+        self.set_current_spline(SplineCurve(color=color))
         return self.current_spline
 
+    def set_current_spline(self, spline):
+        """Сделать spline текущим (None - без текущего); прежний текущий сплайн отбрасывается"""
+        if self.current_spline:
+            self.release_spline(self.current_spline)
+        if spline:
+            self.adopt_spline(spline)
+        self.current_spline = spline
+
+    def on_additional_points_changed(self, delta):
+        self.additional_point_count += delta
+
+    def release_spline(self, spline):
+        """Исключить сплайн из счетчика промежуточных точек"""
+        spline.on_additional_points_changed = None
+        self.additional_point_count -= len(spline.additional_points)
+
+    def adopt_spline(self, spline):
+        """Включить сплайн в счетчик промежуточных точек (обратное к release_spline)"""
+        spline.on_additional_points_changed = self.on_additional_points_changed
+        self.additional_point_count += len(spline.additional_points)
+
     def finish_current_spline(self):
         if self.current_spline and len(self.current_spline.control_points) >= 2:
             self.splines.append(self.current_spline)
@@ -227,14 +513,37 @@ class SplineManager:
         return self.current_spline
 
     def clear_all_splines(self):
+        for spline in self.splines:
+            spline.on_additional_points_changed = None
+        if self.current_spline:
+            self.current_spline.on_additional_points_changed = None
         self.splines.clear()
         self.current_spline = None
+        self.additional_point_count = 0
 
     def remove_last_spline(self):
         if self.splines:
-            return self.splines.pop()
+            spline = self.splines.pop()
+            self.release_spline(spline)
+            return spline
         return None
 
+    def reopen_last_spline(self):
+        """Вернуть последний завершенный сплайн в редактирование (отмена завершения)"""
+        self.current_spline = self.splines.pop()
+        return self.current_spline
+
+    def restore_spline(self, spline):
+        """Вернуть удаленный сплайн в конец списка завершенных"""
+        self.adopt_spline(spline)
+        self.splines.append(spline)
+
+    def restore_all_splines(self, splines, current_spline):
+        """Вернуть сплайны, удаленные clear_all_splines"""
+        for spline in splines:
+            self.restore_spline(spline)
+        self.set_current_spline(current_spline)
+
     def get_spline_count(self):
         return len(self.splines)
 
@@ -247,12 +556,17 @@ class SplineManager:
         return total
 
     def get_total_additional_point_count(self):
-        total = 0
-        for spline in self.splines:
-            total += len(spline.additional_points)
-        if self.current_spline:
-            total += len(self.current_spline.additional_points)
-        return total
+        return self.additional_point_count
+
+
+def render_splines(splines, width=800, height=600, scale=1.0, background="white"):
+    """
+    Отрисовка сплайнов в изображение PIL без окна Tk (теми же методами draw).
+    Модуль offscreen с зависимостью от PIL подключается только здесь.
+    """
+    from offscreen import render_offscreen
+
+    return render_offscreen(splines, width, height, scale, background)
 
 
 class SplineApp:
@@ -264,8 +578,16 @@ class SplineApp:
 
         self.spline_manager = SplineManager()
         self.is_adding_points = False
+        self.history = History()  # Отмена/повтор изменений
 
         self.setup_ui()
+        self.viewport = Viewport()
+        self.scene = SceneLayer(ViewportCanvas(self.canvas, self.viewport))
+        self.pan_start = None
+        self.view_changed = False
+        # Перерисовка - не чаще одного раза за кадр, пересчет сплайнов - в фоновом потоке
+        self.scheduler = RedrawScheduler(self.root, self.redraw_canvas)
+        self.worker = BackgroundWorker(self.root, on_error=self.show_worker_error)
 
     def setup_ui(self):
         # Main container
@@ -330,6 +652,22 @@ class SplineApp:
         ttk.Button(control_frame, text="Очистить все",
                    command=self.clear_all, width=20).pack(fill=tk.X, pady=5)
 
+        # Undo / redo
+        history_frame = ttk.Frame(control_frame)
+        history_frame.pack(fill=tk.X, pady=5)
+
+        ttk.Button(history_frame, text="Отменить",
+                   command=self.undo).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 2))
+
+        ttk.Button(history_frame, text="Повторить",
+                   command=self.redo).pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=(2, 0))
+
+        ttk.Button(control_frame, text="Экспорт в BMP",
+                   command=self.export_image, width=20).pack(fill=tk.X, pady=5)
+
+        ttk.Button(control_frame, text="Сбросить масштаб",
+                   command=self.reset_view, width=20).pack(fill=tk.X, pady=5)
+
         # Info panel
         info_frame = ttk.Frame(control_frame)
         info_frame.pack(fill=tk.X, pady=10)
@@ -349,9 +687,23 @@ class SplineApp:
         # Bind events
         self.canvas.bind("<Button-1>", self.on_canvas_click)
         self.canvas.bind("<Motion>", self.on_canvas_motion)
+        self.canvas.bind("<Configure>", lambda event: self.scheduler.request())
+        # Средняя кнопка - панорамирование, колесо - масштаб относительно курсора
+        self.canvas.bind("<Button-2>", self.on_pan_start)
+        self.canvas.bind("<B2-Motion>", self.on_pan_drag)
+        self.canvas.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.canvas.bind("<Button-4>", self.on_mouse_wheel)
+        self.canvas.bind("<Button-5>", self.on_mouse_wheel)
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
+        self.root.bind("<Control-Shift-Z>", lambda event: self.redo())
 
     def start_spline(self):
-        self.spline_manager.start_new_spline()
+        manager = self.spline_manager
+        previous_spline = manager.get_current_spline()
+        spline = manager.start_new_spline()
+        self.history.record("новый сплайн", lambda: manager.set_current_spline(spline),
+                            lambda: manager.set_current_spline(previous_spline))
         self.is_adding_points = True
         self.update_info()
         self.status_var.set("Режим создания сплайна - кликайте по холсту")
@@ -365,10 +717,12 @@ class SplineApp:
             self.status_var.set("Сначала создайте новый сплайн")
 
     def finish_spline(self):
-        finished_spline = self.spline_manager.finish_current_spline()
+        manager = self.spline_manager
+        finished_spline = manager.finish_current_spline()
         if finished_spline:
+            self.history.record("завершение сплайна", manager.finish_current_spline, manager.reopen_last_spline)
             self.is_adding_points = False
-            self.redraw_canvas()
+            self.scheduler.request()
             point_count = len(finished_spline.control_points)
             additional_count = len(finished_spline.additional_points)
             self.update_info()
@@ -381,7 +735,9 @@ class SplineApp:
         if current_spline:
             removed_point = current_spline.remove_last_control_point()
             if removed_point:
-                self.redraw_canvas()
+                self.history.record("удаление точки", current_spline.remove_last_control_point,
+                                    lambda: current_spline.add_control_point(removed_point))
+                self.scheduler.request()
                 point_count = len(current_spline.control_points)
                 additional_count = len(current_spline.additional_points)
                 self.update_info()
@@ -392,9 +748,12 @@ class SplineApp:
             self.status_var.set("Нет активного сплайна")
 
     def remove_last_spline(self):
-        removed_spline = self.spline_manager.remove_last_spline()
+        manager = self.spline_manager
+        removed_spline = manager.remove_last_spline()
         if removed_spline:
-            self.redraw_canvas()
+            self.history.record("удаление сплайна", manager.remove_last_spline,
+                                lambda: manager.restore_spline(removed_spline))
+            self.scheduler.request()
             self.update_info()
             self.status_var.set("Удален последний сплайн")
         else:
@@ -403,42 +762,87 @@ class SplineApp:
     def update_tension(self, value):
         current_spline = self.spline_manager.get_current_spline()
         if current_spline:
-            current_spline.set_tension(value)
-            self.redraw_canvas()
+            # Пересчет идет в фоне; при быстром движении ползунка выполняется только последний
+            function, args = current_spline.rebuild_job(value)
+            self.worker.submit(current_spline, function, args,
+                               lambda result: self.on_spline_rebuilt(current_spline, result))
             self.status_var.set(f"Натяжение: {float(value):.1f}")
 
+    def on_spline_rebuilt(self, spline, result):
+        """Результат фонового пересчета сплайна (вызывается в потоке Tk)"""
+        spline.apply_rebuild(result)
+        self.update_info()
+        self.scheduler.request()
+
+    def show_worker_error(self, error):
+        """Ошибка фонового пересчета - в строку состояния (вызывается в потоке Tk)"""
+        self.status_var.set(f"Ошибка пересчета: {error}")
+
     def toggle_control_lines(self):
         current_spline = self.spline_manager.get_current_spline()
         if current_spline:
-            current_spline.show_control_lines = not current_spline.show_control_lines
-            self.redraw_canvas()
+            current_spline.toggle_control_lines()
+            self.scheduler.request()
             state = "включены" if current_spline.show_control_lines else "выключены"
             self.status_var.set(f"Контрольные линии {state}")
 
     def toggle_points(self):
         current_spline = self.spline_manager.get_current_spline()
         if current_spline:
-            current_spline.show_points = not current_spline.show_points
-            self.redraw_canvas()
+            current_spline.toggle_points()
+            self.scheduler.request()
             state = "включены" if current_spline.show_points else "выключены"
             self.status_var.set(f"Контрольные точки {state}")
 
     def clear_all(self):
-        self.spline_manager.clear_all_splines()
+        manager = self.spline_manager
+        splines, current_spline = list(manager.splines), manager.get_current_spline()
+        self.history.execute("очистка", manager.clear_all_splines,
+                             lambda: manager.restore_all_splines(splines, current_spline))
         self.is_adding_points = False
-        self.redraw_canvas()
+        self.scheduler.request()
         self.update_info()
         self.status_var.set("Все сплайны удалены")
 
+    def undo(self):
+        self.show_history_step(self.history.undo(), "Отменено", "Нечего отменять")
+
+    def redo(self):
+        self.show_history_step(self.history.redo(), "Повторено", "Нечего повторять")
+
+    def show_history_step(self, command, done_text, empty_text):
+        if command is None:
+            self.status_var.set(empty_text)
+            return
+        self.scheduler.request()
+        self.update_info()
+        self.status_var.set(f"{done_text}: {command.name}")
+
+    def export_image(self):
+        path = filedialog.asksaveasfilename(defaultextension=".bmp",
+                                            filetypes=[("BMP", "*.bmp"), ("PNG", "*.png")])
+        if not path:
+            return
+
+        splines = list(self.spline_manager.splines)
+        current_spline = self.spline_manager.get_current_spline()
+        if current_spline:
+            splines.append(current_spline)
+
+        image = render_splines(splines, self.canvas.winfo_width(), self.canvas.winfo_height())
+        image.save(path)
+        self.status_var.set(f"Изображение сохранено: {path}")
+
     def on_canvas_click(self, event):
         if self.is_adding_points:
             current_spline = self.spline_manager.get_current_spline()
             if current_spline:
-                point = Point(event.x, event.y)
-                current_spline.add_control_point(point)
+                point = Point(*self.viewport.to_world(event.x, event.y))
+                self.history.execute("добавление точки", lambda: current_spline.add_control_point(point),
+                                     current_spline.remove_last_control_point)
                 point_count = len(current_spline.control_points)
                 additional_count = len(current_spline.additional_points)
-                self.redraw_canvas()
+                self.scheduler.request()
                 self.update_info()
                 self.status_var.set(
                     f"Добавлена точка {point_count}. Контрольных: {point_count}, промежуточных: {additional_count}")
@@ -447,34 +851,99 @@ class SplineApp:
         # Можно добавить предпросмотр следующей точки
         pass
 
+    def on_pan_start(self, event):
+        self.pan_start = (event.x, event.y)
+
+    def on_pan_drag(self, event):
+        """Панорамирование: уже нарисованные элементы сдвигаются, дорисовываются только новые видимые"""
+        if not self.pan_start:
+            return
+        dx, dy = event.x - self.pan_start[0], event.y - self.pan_start[1]
+        self.pan_start = (event.x, event.y)
+        self.viewport.pan(dx, dy)
+        self.canvas.move("scene", dx, dy)
+        self.scheduler.request()
+
+    def on_mouse_wheel(self, event):
+        # Windows/macOS передают delta, X11 - события Button-4/Button-5
+        zoom_in = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.zoom(1.2 if zoom_in else 1 / 1.2, event.x, event.y)
+
+    def zoom(self, factor, x, y):
+        """Изменить масштаб относительно точки экрана (x, y)"""
+        if self.viewport.zoom_at(factor, x, y) == 1.0:
+            return
+        # Элементы пересоздаются в новом масштабе в ближайшем кадре
+        self.view_changed = True
+        self.scheduler.request()
+        self.status_var.set(f"Масштаб: {self.viewport.scale:.0%}")
+
+    def reset_view(self):
+        self.viewport.reset()
+        self.view_changed = True
+        self.scheduler.request()
+        self.status_var.set("Масштаб: 100%")
+
     def redraw_canvas(self):
-        self.canvas.delete("all")
+        """Синхронизирует canvas со сценой: пересоздаются только изменившиеся объекты"""
+        # После смены масштаба все элементы пересоздаются с новым уровнем детализации
+        if self.view_changed:
+            self.scene.retain([])
+            self.view_changed = False
 
-        # Рисуем сетку для удобства
-        self.draw_grid()
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        visible = self.viewport.visible_rect(width, height)
 
-        # Рисуем все завершенные сплайны
-        for spline in self.spline_manager.splines:
-            spline.draw(self.canvas)
+        # Сетка перестраивается только при изменении размера холста или вида
+        self.scene.sync("grid", (width, height, visible), self.grid_parts)
 
-        # Рисуем текущий сплайн
+        # Все завершенные сплайны и текущий сплайн
+        splines = list(self.spline_manager.splines)
         current_spline = self.spline_manager.get_current_spline()
         if current_spline:
-            current_spline.draw(self.canvas)
-
-    def draw_grid(self):
-        """Рисует сетку на холсте для удобства позиционирования"""
+            splines.append(current_spline)
+
+        # Сплайны вне видимой области не рисуются; запас - на выход кривой за точки и подписи
+        margin = 40 / self.viewport.scale
+        shown = []
+        for spline in splines:
+            min_x, min_y, max_x, max_y = spline.get_bounds()
+            if (max_x + margin < visible[0] or min_x - margin > visible[2] or
+                    max_y + margin < visible[1] or min_y - margin > visible[3]):
+                continue
+            spline.set_view(self.viewport.scale, self.viewport.detail((min_x, min_y, max_x, max_y)))
+            shown.append(spline)
+
+        for spline in shown:
+            self.scene.sync(spline, spline.revision, spline.scene_parts)
+
+        # Удаляем элементы сплайнов, которых больше нет в сцене или не видно
+        self.scene.retain(["grid"] + shown)
+
+    def grid_parts(self):
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        yield "grid", "grid", (width, height, self.viewport.visible_rect(width, height)), self.draw_grid
+
+    def draw_grid(self, canvas=None):
+        """Рисует сетку сцены (шаг 50) в видимой области; при отдалении шаг удваивается"""
+        canvas = canvas or self.canvas
         width = self.canvas.winfo_width()
         height = self.canvas.winfo_height()
 
         if width > 1 and height > 1:
+            step = 50
+            while step * self.viewport.scale < 25:
+                step *= 2
+            min_x, min_y, max_x, max_y = self.viewport.visible_rect(width, height)
+
             # Вертикальные линии
-            for x in range(0, width, 50):
-                self.canvas.create_line(x, 0, x, height, fill="#f0f0f0", width=1)
+            for x in range(int(min_x // step) * step, int(max_x) + 1, step):
+                canvas.create_line(x, min_y, x, max_y, fill="#f0f0f0", width=1)
 
             # Горизонтальные линии
-            for y in range(0, height, 50):
-                self.canvas.create_line(0, y, width, y, fill="#f0f0f0", width=1)
+            for y in range(int(min_y // step) * step, int(max_y) + 1, step):
+                canvas.create_line(min_x, y, max_x, y, fill="#f0f0f0", width=1)
 
     def update_info(self):
         spline_count = self.spline_manager.get_spline_count()
@@ -485,7 +954,8 @@ class SplineApp:
         if current_spline:
             current_control = len(current_spline.control_points)
             current_additional = len(current_spline.additional_points)
-            info_text = f"Сплайны: {spline_count}, Контрольные: {total_control_points}, Промежуточные: {total_additional_points} (текущий: {current_control}+{current_additional})"
+            length = current_spline.curve_length()
+            info_text = f"Сплайны: {spline_count}, Контрольные: {total_control_points}, Промежуточные: {total_additional_points} (текущий: {current_control}+{current_additional}, длина {length:.0f})"
         else:
             info_text = f"Сплайны: {spline_count}, Контрольные: {total_control_points}, Промежуточные: {total_additional_points}"
 
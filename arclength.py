@@ -0,0 +1,206 @@
+"""
+Длина дуги составных кубических кривых Безье - общая для сплайнов
+Катмулла-Рома ("2-5.py") и Безье ("3 новое"): равномерная расстановка точек
+по длине и ближайшая точка кривой. Сплайн подключает ArcLengthMixin и
+переводит себя в кубические сегменты методом curve_quads.
+
+Пример:
+    table = ArcLengthTable(quads)
+    points = table.resample(spacing=5.0)
+    # После добавления точки в конец пересчитываются только изменившиеся сегменты
+    table = ArcLengthTable(spline.curve_quads(), previous=table)
+"""
+import numpy as np
+
+from geometry import Point
+
+
+# Узлы и веса квадратуры Гаусса-Лежандра на отрезке [0, 1]
+_GAUSS_NODES, _GAUSS_WEIGHTS = np.polynomial.legendre.leggauss(5)
+_GAUSS_NODES = (_GAUSS_NODES + 1) / 2
+_GAUSS_WEIGHTS = _GAUSS_WEIGHTS / 2
+
+
+class ArcLengthTable:
+    """
+    Таблица длины дуги составной кубической кривой Безье. Параметр кривой u
+    лежит в [0, k]: целая часть - номер сегмента, дробная - t внутри него.
+    На каждом сегменте samples равных шагов по t; длина каждого шага считается
+    квадратурой Гаусса-Лежандра, поэтому таблица точна, а не хордовая.
+    Длина -> параметр: двоичный поиск по таблице и несколько шагов Ньютона.
+    previous - прежняя таблица той же кривой, из которой берутся совпавшие сегменты.
+    """
+
+    SAMPLES = 32  # шагов таблицы на сегмент
+    NEWTON_STEPS = 4
+    CANDIDATES = 4  # сколько ближайших отрезков таблицы уточняется в closest_point
+
+    def __init__(self, quads, samples=SAMPLES, previous=None):
+        self.quads = np.asarray(quads, dtype=np.float64).reshape(-1, 4, 2)
+        if not len(self.quads):
+            raise ValueError("Кривая без сегментов")
+        self.segment_count = len(self.quads)
+        self.samples = samples
+        # Коэффициенты степенной формы B(t) = ((a t + b) t + c) t + d: массив (4, k, 2) - d, c, b, a
+        p0, p1, p2, p3 = self.quads.transpose(1, 0, 2)
+        self.coefficients = np.stack([p0, 3 * (p1 - p0), 3 * (p2 - 2 * p1 + p0), p3 - p0 + 3 * (p1 - p2)])
+        self.parameters = np.linspace(0.0, self.segment_count, self.segment_count * samples + 1)
+
+        # Начало таблицы previous с теми же сегментами переиспользуется: после добавления
+        # или удаления точки в конце квадратура считается только для нескольких последних сегментов
+        start = self.shared_segments(previous) * samples
+        tail = self.parameters[start:]
+        points = self.point_at(tail)
+        distances = np.cumsum(np.concatenate(([0.0], self.integrate(tail[:-1], tail[1:]))))
+        if start:
+            points = np.concatenate([previous.points[:start], points])
+            distances = np.concatenate([previous.distances[:start], previous.distances[start] + distances])
+        self.points, self.distances = points, distances
+
+    def shared_segments(self, previous):
+        """Сколько первых сегментов кривой совпадает с сегментами таблицы previous"""
+        if previous is None or previous.samples != self.samples:
+            return 0
+        count = min(self.segment_count, previous.segment_count)
+        same = (previous.quads[:count] == self.quads[:count]).all(axis=(1, 2))
+        return count if same.all() else int(np.argmin(same))
+
+    @property
+    def length(self):
+        return float(self.distances[-1])
+
+    def split(self, u):
+        """Параметр u -> (номер сегмента, t внутри сегмента)"""
+        u = np.clip(np.asarray(u, dtype=np.float64), 0.0, self.segment_count)
+        segment = np.minimum(u.astype(np.int64), self.segment_count - 1)
+        return segment, u - segment
+
+    def point_at(self, u, order=0):
+        """Точки кривой (order = 0), первые (1) или вторые (2) производные при значениях параметра u"""
+        segment, t = self.split(u)
+        d, c, b, a = self.coefficients[:, segment]
+        t = t[..., None]
+        if order == 0:
+            return ((a * t + b) * t + c) * t + d
+        if order == 1:
+            return (3 * a * t + 2 * b) * t + c
+        return 6 * a * t + 2 * b
+
+    def speed(self, u):
+        """|dB/du| - скорость движения точки по кривой"""
+        return np.hypot(*np.moveaxis(self.point_at(u, 1), -1, 0))
+
+    def integrate(self, a, b):
+        """Длина дуги от a до b (оба конца внутри одного сегмента)"""
+        a = np.asarray(a, dtype=np.float64)
+        width = np.asarray(b, dtype=np.float64) - a
+        nodes = a[..., None] + width[..., None] * _GAUSS_NODES
+        return self.speed(nodes) @ _GAUSS_WEIGHTS * width
+
+    def length_at(self, u):
+        """Длина дуги от начала кривой до параметра u"""
+        u = np.clip(np.asarray(u, dtype=np.float64), 0.0, self.segment_count)
+        index = np.clip(np.searchsorted(self.parameters, u, side="right") - 1, 0, len(self.parameters) - 2)
+        return self.distances[index] + self.integrate(self.parameters[index], u)
+
+    def parameter_at(self, distance):
+        """Параметр u точки, до которой от начала кривой ровно distance (скаляр или массив)"""
+        distance = np.clip(np.asarray(distance, dtype=np.float64), 0.0, self.length)
+        # Двоичный поиск дает шаг таблицы, внутри шага - линейная оценка и уточнение Ньютоном
+        index = np.clip(np.searchsorted(self.distances, distance, side="right") - 1, 0, len(self.distances) - 2)
+        u0, u1 = self.parameters[index], self.parameters[index + 1]
+        s0, s1 = self.distances[index], self.distances[index + 1]
+        span = s1 - s0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = u0 + (u1 - u0) * np.where(span > 0, (distance - s0) / span, 0.0)
+        for _ in range(self.NEWTON_STEPS):
+            error = s0 + self.integrate(u0, u) - distance
+            speed = self.speed(u)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                u = np.clip(u - np.where(speed > 1e-12, error / speed, 0.0), u0, u1)
+        return u
+
+    def resample(self, spacing=None, count=None):
+        """
+        Точки через равные расстояния вдоль кривой: с шагом spacing (от начала,
+        остаток в конце меньше шага) или count точек от начала до конца
+        """
+        if count is not None:
+            distances = np.linspace(0.0, self.length, count)
+        else:
+            if spacing is None or spacing <= 0:
+                raise ValueError(f"Шаг должен быть положительным: {spacing}")
+            distances = np.arange(0.0, self.length + 1e-9, spacing)
+        return self.point_at(self.parameter_at(distances))
+
+    def closest_point(self, x, y):
+        """
+        Ближайшая к (x, y) точка кривой: (точка, параметр u, расстояние).
+        Грубо - несколько ближайших отрезков ломаной таблицы, точно - метод Ньютона
+        для (B(u) - P) * B'(u) = 0 в пределах соседних шагов таблицы.
+        """
+        target = np.array([x, y], dtype=np.float64)
+        starts, ends = self.points[:-1], self.points[1:]
+        chords = ends - starts
+        lengths = np.maximum((chords * chords).sum(axis=1), 1e-24)
+        ratio = np.clip(((target - starts) * chords).sum(axis=1) / lengths, 0.0, 1.0)
+        offsets = starts + chords * ratio[:, None] - target
+        coarse = (offsets * offsets).sum(axis=1)
+
+        count = min(self.CANDIDATES, len(coarse))
+        index = np.argpartition(coarse, count - 1)[:count]
+        low = self.parameters[np.maximum(index - 1, 0)]
+        high = self.parameters[np.minimum(index + 2, len(self.parameters) - 1)]
+        start = self.parameters[index] + (self.parameters[index + 1] - self.parameters[index]) * ratio[index]
+        u = start
+        for _ in range(self.NEWTON_STEPS):
+            offset = self.point_at(u) - target
+            first = self.point_at(u, 1)
+            slope = (first * first).sum(axis=-1) + (offset * self.point_at(u, 2)).sum(axis=-1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step = np.where(slope > 1e-12, (offset * first).sum(axis=-1) / slope, 0.0)
+            u = np.clip(u - step, low, high)
+
+        # Ньютон может уйти к другому экстремуму - выбираем лучшую из уточненных и грубых оценок
+        u = np.concatenate([u, start])
+        points = self.point_at(u)
+        distances = np.hypot(*(points - target).T)
+        best = int(np.argmin(distances))
+        return points[best], float(u[best]), float(distances[best])
+
+
+class ArcLengthMixin:
+    """
+    Длина дуги для сплайна с методами curve_quads и control_array и полями
+    geometry_version, tension и arc_length_cache. Таблица строится при первом
+    обращении и обновляется после изменения кривой по прежней таблице.
+    """
+
+    def arc_length_table(self):
+        """Таблица длины дуги (None - кривой нет)"""
+        key = (self.geometry_version, self.tension)
+        if self.arc_length_cache is None or self.arc_length_cache[0] != key:
+            quads = self.curve_quads()
+            previous = self.arc_length_cache[1] if self.arc_length_cache else None
+            self.arc_length_cache = (key, ArcLengthTable(quads, previous=previous) if len(quads) else None)
+        return self.arc_length_cache[1]
+
+    def curve_length(self):
+        """Длина кривой"""
+        table = self.arc_length_table()
+        return 0.0 if table is None else table.length
+
+    def resample_by_length(self, spacing=None, count=None):
+        """Точки кривой через равные расстояния (шаг spacing или count точек) - массив (M, 2)"""
+        table = self.arc_length_table()
+        if table is None:
+            return self.control_array().copy()
+        return table.resample(spacing, count)
+
+    def closest_point(self, x, y):
+        """Ближайшая к (x, y) точка кривой: (Point, параметр, расстояние) или None"""
+        table = self.arc_length_table()
+        if table is None:
+            return None
+        point, parameter, distance = table.closest_point(x, y)
+        return Point(*point.tolist()), parameter, distance
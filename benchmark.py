@@ -0,0 +1,676 @@
+"""
+Бенчмарки отрисовки для лабораторных "1.py", "2-5.py" и "3 новое".
+
+Сцены генерируются детерминированно (по seed), поэтому результаты разных
+запусков сравнимы. Отрисовка идет на CountingCanvas - заглушку canvas,
+которая только считает созданные элементы, так что Tk и дисплей не нужны.
+
+Запуск:
+    python benchmark.py run [-o results.json] [--quick] [-k подстрока]
+    python benchmark.py compare old.json new.json [--threshold 0.1] [--fail]
+"""
+import argparse
+import datetime
+import importlib.machinery
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_lab(name, filename):
+    """Загрузить скрипт лабораторной как модуль (у "3 новое" нет расширения .py)"""
+    if name in sys.modules:
+        return sys.modules[name]
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    loader = importlib.machinery.SourceFileLoader(name, os.path.join(ROOT, filename))
+    spec = importlib.util.spec_from_loader(name, loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# =============================================================================
+# CANVAS-ЗАГЛУШКА
+# =============================================================================
+
+class CountingCanvas:
+    """
+    Заглушка tkinter.Canvas: ничего не рисует, но хранит элементы с тегами
+    (этого достаточно для SceneLayer) и считает созданные элементы по типам.
+    """
+
+    def __init__(self, width=800, height=600):
+        self.width = width
+        self.height = height
+        self.items = {}    # id -> теги
+        self.tagged = {}   # тег -> множество id
+        self.created = Counter()
+        self.operations = 0
+        self.next_id = 0
+
+    def create_item(self, kind, tags=()):
+        if isinstance(tags, str):
+            tags = (tags,)
+        self.next_id += 1
+        self.items[self.next_id] = tags
+        for tag in tags:
+            self.tagged.setdefault(tag, set()).add(self.next_id)
+        self.created[kind] += 1
+        return self.next_id
+
+    def __getattr__(self, name):
+        if name.startswith("create_"):
+            kind = name[len("create_"):]
+            return lambda *args, tags=(), **kwargs: self.create_item(kind, tags)
+        raise AttributeError(name)
+
+    def find_withtag(self, tag):
+        if tag == "all":
+            return tuple(self.items)
+        if isinstance(tag, int):
+            return (tag,) if tag in self.items else ()
+        return tuple(self.tagged.get(tag, ()))
+
+    def delete(self, *tags):
+        self.operations += 1
+        for tag in tags:
+            for item_id in self.find_withtag(tag):
+                for item_tag in self.items.pop(item_id):
+                    self.tagged[item_tag].discard(item_id)
+
+    def tag_lower(self, *args):
+        self.operations += 1
+
+    def tag_raise(self, *args):
+        self.operations += 1
+
+    def move(self, *args):
+        self.operations += 1
+
+    def coords(self, *args):
+        self.operations += 1
+
+    def itemconfigure(self, *args, **kwargs):
+        self.operations += 1
+
+    itemconfig = itemconfigure
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def canvasx(self, x):
+        return float(x)
+
+    def canvasy(self, y):
+        return float(y)
+
+    def item_count(self):
+        """Сколько элементов сейчас на canvas"""
+        return len(self.items)
+
+    def created_count(self):
+        """Сколько элементов создано за все время"""
+        return sum(self.created.values())
+
+
+# =============================================================================
+# ГЕНЕРАТОРЫ СЦЕН
+# =============================================================================
+
+def random_points(rng, count, width, height):
+    """count точек, равномерно распределенных по прямоугольнику width x height"""
+    return rng.uniform((0, 0), (width, height), size=(count, 2))
+
+
+def spline_scene(lab, splines, points, seed=0, width=800, height=600):
+    """SplineManager лабораторной lab с splines сплайнами по points контрольных точек"""
+    rng = np.random.default_rng(seed)
+    manager = lab.SplineManager()
+    for _ in range(splines):
+        spline = manager.start_new_spline()
+        for x, y in random_points(rng, points, width, height).tolist():
+            spline.add_control_point(lab.Point(x, y))
+        manager.finish_current_spline()
+    return manager
+
+
+def star_scene(lab, count, seed=0, width=800, height=600):
+    """count звезд ShapeFactory.create_pentagonal_star в случайных местах и размеров 20-60"""
+    rng = np.random.default_rng(seed)
+    centers = random_points(rng, count, width, height).tolist()
+    sizes = rng.uniform(20, 60, size=count).tolist()
+    return [lab.ShapeFactory.create_pentagonal_star(x, y, size) for (x, y), size in zip(centers, sizes)]
+
+
+def shape17_grid(lab, rows, columns, size=40, spacing=50):
+    """Сетка rows x columns фигур Shape17"""
+    return [lab.Shape17(spacing * (column + 0.5), spacing * (row + 0.5), size=size, border_width=2)
+            for row in range(rows) for column in range(columns)]
+
+
+def headless_painter(lab, canvas, polygons=(), spline_manager=None):
+    """PainterApp из "3 новое" без окна: только то, что нужно redraw_canvas"""
+    app = lab.PainterApp.__new__(lab.PainterApp)
+    app.canvas = canvas
+    app.polygons = list(polygons)
+    app.spline_manager = spline_manager or lab.SplineManager()
+    app.bitmap_resources = []
+    app.scene_file = None
+    app.viewport = lab.Viewport()
+    app.scene = lab.SceneLayer(lab.ViewportCanvas(canvas, app.viewport))
+    app.scene_index = lab.SceneIndex()
+    app.selection = []
+    app.view_changed = False
+    return app
+
+
+def headless_spline_app(lab, canvas, spline_manager):
+    """SplineApp из "2-5.py" без окна: только то, что нужно redraw_canvas"""
+    app = lab.SplineApp.__new__(lab.SplineApp)
+    app.canvas = canvas
+    app.spline_manager = spline_manager
+    app.viewport = lab.Viewport()
+    app.scene = lab.SceneLayer(lab.ViewportCanvas(canvas, app.viewport))
+    app.view_changed = False
+    return app
+
+
+# =============================================================================
+# ИЗМЕРЕНИЕ
+# =============================================================================
+
+def measure(function, setup=None, repeat=5, min_time=0.2):
+    """
+    Время одного вызова function в секундах: список из repeat замеров.
+    Без setup число вызовов в замере подбирается так, чтобы замер длился
+    не меньше min_time; с setup каждый замер - один вызов после setup()
+    (setup не входит во время), а repeat увеличивается до 2 * repeat.
+    """
+    if setup is not None:
+        samples = []
+        for _ in range(repeat * 2):
+            setup()
+            start = time.perf_counter()
+            function()
+            samples.append(time.perf_counter() - start)
+        return samples, 1
+
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        samples.append((time.perf_counter() - start) / loops)
+    return samples, loops
+
+
+class Benchmark:
+    """
+    Один бенчмарк: prepare() готовит данные и возвращает (function, setup) -
+    измеряемую функцию и необязательную подготовку перед каждым вызовом.
+    counter() (если задан) после замеров возвращает словарь счетчиков
+    (например, число элементов canvas за один вызов).
+    """
+
+    def __init__(self, name, params, prepare):
+        self.name = name
+        self.params = params
+        self.prepare = prepare
+
+    @property
+    def full_name(self):
+        if not self.params:
+            return self.name
+        return "%s[%s]" % (self.name, ",".join("%s=%s" % item for item in self.params.items()))
+
+    def run(self, repeat=5, min_time=0.2):
+        function, setup, counter = self.prepare(**self.params)
+        samples, loops = measure(function, setup, repeat, min_time)
+        result = {
+            "name": self.name,
+            "params": self.params,
+            "loops": loops,
+            "repeat": len(samples),
+            "min": min(samples),
+            "median": statistics.median(samples),
+            "mean": statistics.fmean(samples),
+            "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        }
+        if counter is not None:
+            result["counters"] = counter()
+        return result
+
+
+# =============================================================================
+# НАБОР БЕНЧМАРКОВ
+# =============================================================================
+
+def catmull_rom_point_bench(splines, points, samples=20):
+    """Поточечный Катмулл-Ром (SplineCurve.catmull_rom_point) по всем сегментам сцены"""
+    lab = load_lab("lab_2_5", "2-5.py")
+    manager = spline_scene(lab, splines, points)
+    ts = np.linspace(0, 1, samples).tolist()
+
+    def function():
+        for spline in manager.splines:
+            cp = spline.control_points
+            for i in range(1, len(cp) - 2):
+                p0, p1, p2, p3 = cp[i - 1], cp[i], cp[i + 1], cp[i + 2]
+                for t in ts:
+                    spline.catmull_rom_point(t, p0, p1, p2, p3)
+
+    return function, None, None
+
+
+def bezier_point_bench(splines, points, samples=20):
+    """SplineCurve.bezier_point по кубическим сегментам гладкой кривой"""
+    lab = load_lab("lab_3", "3 новое")
+    manager = spline_scene(lab, splines, points)
+    segments = []
+    for spline in manager.splines:
+        extended = spline.calculate_smooth_bezier_points()
+        segments.extend((spline, extended[i:i + 4]) for i in range(0, len(extended) - 3, 3))
+    ts = np.linspace(0, 1, samples).tolist()
+
+    def function():
+        for spline, quad in segments:
+            for t in ts:
+                spline.bezier_point(t, quad)
+
+    return function, None, None
+
+
+def bezier_degree_bench(degree, samples=100):
+    """SplineCurve.bezier_point по всем контрольным точкам сразу (кривая степени degree)"""
+    lab = load_lab("lab_3", "3 новое")
+    spline = spline_scene(lab, 1, degree + 1).splines[0]
+    points = list(spline.control_points)
+    ts = np.linspace(0, 1, samples).tolist()
+
+    def function():
+        for t in ts:
+            spline.bezier_point(t, points)
+
+    return function, None, None
+
+
+def bezier_curve_bench(degree, samples=100):
+    """SplineCurve.bezier_curve: та же кривая степени degree одним произведением на кэшированную матрицу"""
+    lab = load_lab("lab_3", "3 новое")
+    spline = spline_scene(lab, 1, degree + 1).splines[0]
+
+    def function():
+        spline.bezier_curve(samples)
+
+    return function, None, None
+
+
+def smooth_bezier_points_bench(splines, points):
+    """SplineCurve.calculate_smooth_bezier_points для всех сплайнов сцены"""
+    lab = load_lab("lab_3", "3 новое")
+    manager = spline_scene(lab, splines, points)
+
+    def function():
+        for spline in manager.splines:
+            spline.calculate_smooth_bezier_points()
+
+    return function, None, None
+
+
+def additional_points_bench(splines, points):
+    """SplineCurve.generate_additional_points для всех сплайнов сцены"""
+    lab = load_lab("lab_2_5", "2-5.py")
+    manager = spline_scene(lab, splines, points)
+
+    def function():
+        for spline in manager.splines:
+            spline.generate_additional_points()
+
+    return function, None, None
+
+
+def polygon_transform_bench(stars):
+    """Polygon.transform (перенос + поворот) с применением к вершинам"""
+    lab = load_lab("lab_3", "3 новое")
+    polygons = star_scene(lab, stars)
+
+    def function():
+        for polygon in polygons:
+            polygon.transform(1, -1, 3)
+            polygon.apply_pending_transform()
+
+    return function, None, None
+
+
+def polygon_spans_bench(stars, cached):
+    """Polygon.spans: отрезки заливки сканирующей строкой (с пустым или заполненным кэшем)"""
+    lab = load_lab("lab_3", "3 новое")
+    polygons = star_scene(lab, stars)
+
+    def function():
+        for polygon in polygons:
+            polygon.spans()
+
+    def setup():
+        for polygon in polygons:
+            polygon.span_cache.clear()
+
+    if cached:
+        function()
+    return function, None if cached else setup, None
+
+
+def arc_length_bench(splines, points, query):
+    """
+    Таблица длины дуги сплайнов "3 новое": build - построение таблиц,
+    append - длина после добавления точки в конец (как при клике; таблица
+    обновляется по прежней), resample - равномерная расстановка через 5 px,
+    closest - ближайшая точка для 10 случайных точек на каждый сплайн
+    """
+    lab = load_lab("lab_3", "3 новое")
+    manager = spline_scene(lab, splines, points)
+    targets = random_points(np.random.default_rng(1), 10, 800, 600).tolist()
+
+    if query == "build":
+        def function():
+            for spline in manager.splines:
+                spline.arc_length_cache = None
+                spline.arc_length_table()
+    elif query == "append":
+        def function():
+            for spline in manager.splines:
+                spline.add_control_point(lab.Point(400, 300))
+                spline.curve_length()
+                spline.remove_last_control_point()
+                spline.curve_length()
+    elif query == "resample":
+        def function():
+            for spline in manager.splines:
+                spline.resample_by_length(spacing=5.0)
+    else:
+        def function():
+            for spline in manager.splines:
+                for x, y in targets:
+                    spline.closest_point(x, y)
+
+    for spline in manager.splines:
+        spline.arc_length_table()
+    return function, None, None
+
+
+def pattern_tile_bench(width, height):
+    """PatternBrush.tile: узор на всю область width x height"""
+    lab = load_lab("lab_3", "3 новое")
+    bitmap = lab.BitmapResource(32, 32)
+    bitmap.create_star_pattern()
+    brush = lab.PatternBrush(bitmap)
+
+    def function():
+        brush.tile(width, height)
+
+    return function, None, None
+
+
+def pattern_fill_bench(stars, cached):
+    """PatternBrush.render_polygon_fill для звезд сцены (с пустым или заполненным кэшем)"""
+    lab = load_lab("lab_3", "3 новое")
+    bitmap = lab.BitmapResource(32, 32)
+    bitmap.create_star_pattern()
+    brush = lab.PatternBrush(bitmap)
+    brush.CACHE_SIZE = max(brush.CACHE_SIZE, stars)
+    shapes = [polygon.points.array() for polygon in star_scene(lab, stars)]
+
+    def function():
+        for coords in shapes:
+            brush.render_polygon_fill(coords)
+
+    setup = None if cached else brush.fill_cache.clear
+    if cached:
+        function()
+    return function, setup, None
+
+
+def painter_redraw_bench(stars, splines, points, mode):
+    """
+    PainterApp.redraw_canvas ("3 новое"):
+    cold - первая отрисовка новой сцены, warm - повторная без изменений,
+    edit - после изменения одного сплайна, zoom - после смены масштаба
+    """
+    lab = load_lab("lab_3", "3 новое")
+    state = {}
+
+    def setup():
+        # Сцена создается заново, чтобы кэши сплайнов не переходили между замерами
+        canvas = state["canvas"] = CountingCanvas()
+        manager = spline_scene(lab, splines, points, seed=1)
+        app = state["app"] = headless_painter(lab, canvas, star_scene(lab, stars), manager)
+        if mode != "cold":
+            app.redraw_canvas()
+        state["created"] = canvas.created_count()
+
+        if mode == "edit":
+            manager.splines[0].add_control_point(lab.Point(400, 300))
+        elif mode == "zoom":
+            app.viewport.zoom_at(0.8, 400, 300)
+            app.view_changed = True
+
+    def function():
+        state["app"].redraw_canvas()
+
+    def counter():
+        canvas = state["canvas"]
+        return {"items_created": canvas.created_count() - state["created"], "items_on_canvas": canvas.item_count()}
+
+    if mode == "warm":
+        setup()
+        return function, None, counter
+    return function, setup, counter
+
+
+def spline_app_redraw_bench(splines, points, mode):
+    """SplineApp.redraw_canvas ("2-5.py"): cold - первая отрисовка новой сцены, warm - повторная без изменений"""
+    lab = load_lab("lab_2_5", "2-5.py")
+    state = {}
+
+    def setup():
+        canvas = state["canvas"] = CountingCanvas()
+        app = state["app"] = headless_spline_app(lab, canvas, spline_scene(lab, splines, points))
+        if mode == "warm":
+            app.redraw_canvas()
+        state["created"] = canvas.created_count()
+
+    def function():
+        state["app"].redraw_canvas()
+
+    def counter():
+        canvas = state["canvas"]
+        return {"items_created": canvas.created_count() - state["created"], "items_on_canvas": canvas.item_count()}
+
+    if mode == "warm":
+        setup()
+        return function, None, counter
+    return function, setup, counter
+
+
+def shape17_show_bench(rows, columns):
+    """Shape17.show для сетки фигур ("1.py")"""
+    lab = load_lab("lab_1", "1.py")
+    shapes = shape17_grid(lab, rows, columns)
+    canvas = CountingCanvas()
+
+    def function():
+        for shape in shapes:
+            shape.show(canvas)
+
+    def counter():
+        return {"items_per_call": 2 * len(shapes)}
+
+    return function, None, counter
+
+
+def build_suite(quick=False):
+    """Список бенчмарков; quick - только малые сцены (для быстрой проверки)"""
+    scenes = [(10, 20)] if quick else [(10, 20), (50, 100)]
+    suite = []
+    for splines, points in scenes:
+        scene = {"splines": splines, "points": points}
+        suite += [
+            Benchmark("catmull_rom_point", scene, catmull_rom_point_bench),
+            Benchmark("bezier_point", scene, bezier_point_bench),
+            Benchmark("calculate_smooth_bezier_points", scene, smooth_bezier_points_bench),
+            Benchmark("generate_additional_points", scene, additional_points_bench),
+        ]
+        for mode in ("cold", "warm"):
+            suite.append(Benchmark("spline_app.redraw_canvas", dict(scene, mode=mode), spline_app_redraw_bench))
+        for query in ("build", "append", "resample", "closest"):
+            suite.append(Benchmark("spline.arc_length", dict(scene, query=query), arc_length_bench))
+
+    for degree in ([10] if quick else [10, 50]):
+        suite.append(Benchmark("bezier_point.degree", {"degree": degree}, bezier_degree_bench))
+    for degree in ([10] if quick else [10, 50, 200]):
+        suite.append(Benchmark("bezier_curve.degree", {"degree": degree}, bezier_curve_bench))
+
+    for stars in ([50] if quick else [50, 500]):
+        suite += [
+            Benchmark("polygon.transform", {"stars": stars}, polygon_transform_bench),
+            Benchmark("polygon.spans", {"stars": stars, "cached": False}, polygon_spans_bench),
+            Benchmark("polygon.spans", {"stars": stars, "cached": True}, polygon_spans_bench),
+            Benchmark("pattern.fill", {"stars": stars, "cached": False}, pattern_fill_bench),
+            Benchmark("pattern.fill", {"stars": stars, "cached": True}, pattern_fill_bench),
+        ]
+    suite.append(Benchmark("pattern.tile", {"width": 800, "height": 600}, pattern_tile_bench))
+
+    for stars, splines, points in ([(50, 10, 20)] if quick else [(50, 10, 20), (500, 50, 100)]):
+        for mode in ("cold", "warm", "edit", "zoom"):
+            params = {"stars": stars, "splines": splines, "points": points, "mode": mode}
+            suite.append(Benchmark("painter.redraw_canvas", params, painter_redraw_bench))
+
+    for size in ([10] if quick else [10, 40]):
+        suite.append(Benchmark("shape17.show", {"rows": size, "columns": size}, shape17_show_bench))
+    return suite
+
+
+# =============================================================================
+# РЕЗУЛЬТАТЫ И СРАВНЕНИЕ
+# =============================================================================
+
+def run_suite(quick=False, pattern=None, repeat=5, min_time=0.2, stream=sys.stdout):
+    """Выполнить бенчмарки и вернуть результаты в виде словаря для JSON"""
+    results = {}
+    for benchmark in build_suite(quick):
+        name = benchmark.full_name
+        if pattern and pattern not in name:
+            continue
+        result = benchmark.run(repeat, min_time)
+        results[name] = result
+        print("%-70s %12s" % (name, format_time(result["median"])), file=stream, flush=True)
+
+    return {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "quick": quick,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def format_time(seconds):
+    for unit, factor in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= factor:
+            return "%.3f %s" % (seconds / factor, unit)
+    return "%.1f ns" % (seconds * 1e9)
+
+
+def compare_results(old, new, threshold=0.1):
+    """
+    Сравнить два запуска по медианам. Возвращает (строки отчета, число регрессий).
+    Регрессия - замедление больше чем в 1 + threshold раз.
+    """
+    old_results, new_results = old["results"], new["results"]
+    lines = ["%-70s %12s %12s %8s" % ("benchmark", "old", "new", "ratio")]
+    regressions = 0
+    for name in sorted(set(old_results) | set(new_results)):
+        if name not in old_results or name not in new_results:
+            where = "new" if name in new_results else "old"
+            lines.append("%-70s %s" % (name, "only in " + where))
+            continue
+
+        old_time, new_time = old_results[name]["median"], new_results[name]["median"]
+        ratio = new_time / old_time if old_time else float("inf")
+        mark = ""
+        if ratio > 1 + threshold:
+            mark = "  SLOWER"
+            regressions += 1
+        elif ratio < 1 / (1 + threshold):
+            mark = "  faster"
+        lines.append("%-70s %12s %12s %7.2fx%s" % (name, format_time(old_time), format_time(new_time),
+                                                   ratio, mark))
+    lines.append("regressions: %d (threshold %.0f%%)" % (regressions, threshold * 100))
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки отрисовки лабораторных")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="выполнить бенчмарки")
+    run_parser.add_argument("-o", "--output", help="файл JSON для результатов")
+    run_parser.add_argument("-k", dest="pattern", help="только бенчмарки, имя которых содержит подстроку")
+    run_parser.add_argument("--quick", action="store_true", help="только малые сцены")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--min-time", type=float, default=0.2, help="минимальная длительность замера, с")
+
+    compare_parser = commands.add_parser("compare", help="сравнить два файла результатов")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="допустимое замедление (0.1 = 10%%)")
+    compare_parser.add_argument("--fail", action="store_true", help="код возврата 1 при регрессиях")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        results = run_suite(args.quick, args.pattern, args.repeat, args.min_time)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as file:
+                json.dump(results, file, indent=2, ensure_ascii=False)
+        return 0
+
+    with open(args.old, encoding="utf-8") as file:
+        old = json.load(file)
+    with open(args.new, encoding="utf-8") as file:
+        new = json.load(file)
+    lines, regressions = compare_results(old, new, args.threshold)
+    print("\n".join(lines))
+    return 1 if args.fail and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
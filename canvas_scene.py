@@ -0,0 +1,206 @@
+"""
+Retained-отрисовка на tkinter.Canvas, общая для "2-5.py" и "3 новое".
+SceneLayer хранит id элементов canvas каждого объекта сцены и при
+синхронизации пересоздает только изменившиеся части объекта; Viewport
+задает масштаб, сдвиг и уровни детализации, а ViewportCanvas переводит
+координаты сцены в экранные при создании элементов.
+
+Порядок слоев снизу вверх задает SceneLayer.LAYERS - приложение
+переопределяет его в подклассе:
+
+    class SceneLayer(canvas_scene.SceneLayer):
+        LAYERS = ("polygons", "curve", "points")
+"""
+import numpy as np
+
+
+class TaggingCanvas:
+    """Обертка над canvas: добавляет теги ко всем создаваемым элементам и запоминает их id"""
+
+    def __init__(self, canvas, tags):
+        self.canvas = canvas
+        self.tags = tags
+        self.item_ids = []
+
+    def __getattr__(self, name):
+        attr = getattr(self.canvas, name)
+        if not name.startswith("create_"):
+            return attr
+
+        def create(*args, **kwargs):
+            item_id = attr(*args, tags=self.tags, **kwargs)
+            self.item_ids.append(item_id)
+            return item_id
+
+        return create
+
+
+class SceneLayer:
+    """
+    Retained-режим отрисовки: для каждого объекта сцены хранятся id его элементов canvas.
+    Объект описывает себя набором частей (ключ, слой, сигнатура, функция рисования);
+    при синхронизации пересоздаются только части, у которых изменилась сигнатура.
+    """
+
+    # Порядок слоев снизу вверх
+    LAYERS = ("items",)
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.parts = {}      # объект -> {ключ части: (сигнатура, слой, [id элементов])}
+        self.revisions = {}  # объект -> ревизия на момент последней синхронизации
+        self.layer_sizes = dict.fromkeys(self.LAYERS, 0)
+
+    def sync(self, key, revision, get_parts):
+        """Обновить элементы объекта, если его ревизия изменилась"""
+        if key in self.revisions and self.revisions[key] == revision:
+            return
+
+        old_parts = self.parts.get(key, {})
+        new_parts = {}
+        for part_key, layer, signature, draw in get_parts():
+            entry = old_parts.pop(part_key, None)
+            if entry is None or entry[0] != signature:
+                if entry is not None:
+                    self.delete_entry(entry)
+                entry = self.create_entry(key, layer, signature, draw)
+            new_parts[part_key] = entry
+
+        # Части, которых больше нет у объекта
+        for entry in old_parts.values():
+            self.delete_entry(entry)
+
+        self.parts[key] = new_parts
+        self.revisions[key] = revision
+
+    def create_entry(self, key, layer, signature, draw):
+        """Нарисовать часть объекта и поставить ее элементы в свой слой"""
+        layer_tag = "layer_" + layer
+        tagging_canvas = TaggingCanvas(self.canvas, ("scene", layer_tag, "obj%d" % id(key)))
+        draw(tagging_canvas)
+        item_ids = tagging_canvas.item_ids
+
+        # Новые элементы появляются сверху - опускаем их под ближайший непустой верхний слой
+        upper_layers = self.LAYERS[self.LAYERS.index(layer) + 1:]
+        for upper in upper_layers:
+            if self.layer_sizes[upper]:
+                for item_id in item_ids:
+                    self.canvas.tag_lower(item_id, "layer_" + upper)
+                break
+
+        self.layer_sizes[layer] += len(item_ids)
+        return signature, layer, item_ids
+
+    def delete_entry(self, entry):
+        """Удалить элементы одной части"""
+        _, layer, item_ids = entry
+        if item_ids:
+            self.canvas.delete(*item_ids)
+            self.layer_sizes[layer] -= len(item_ids)
+
+    def remove(self, key):
+        """Удалить все элементы объекта с canvas"""
+        for entry in self.parts.pop(key, {}).values():
+            self.delete_entry(entry)
+        self.revisions.pop(key, None)
+
+    def retain(self, keys):
+        """Оставить на canvas только перечисленные объекты"""
+        keep = set(keys)
+        for key in [key for key in self.parts if key not in keep]:
+            self.remove(key)
+
+
+class Viewport:
+    """
+    Область просмотра: точка экрана = точка сцены * scale + (offset_x, offset_y).
+    Кроме преобразования координат задает уровни детализации: при отдалении
+    сначала пропадают подписи, затем маркеры точек, а объекты, которые на экране
+    меньше OUTLINE_MAX_SIZE пикселей, рисуются одной упрощенной ломаной.
+    """
+    MIN_SCALE = 0.05
+    MAX_SCALE = 20.0
+
+    # Уровни детализации сплайнов
+    FULL = "full"          # кривая, точки и подписи
+    MARKERS = "markers"    # точки без подписей
+    CURVE = "curve"        # только кривая и контрольные линии
+    OUTLINE = "outline"    # одна упрощенная ломаная
+
+    LABELS_MIN_SCALE = 0.75
+    MARKERS_MIN_SCALE = 0.4
+    OUTLINE_MAX_SIZE = 40      # пикселей экрана
+    OUTLINE_TOLERANCE = 2.0    # допуск упрощенной ломаной в пикселях экрана
+
+    def __init__(self):
+        self.scale = 1.0
+        self.offset_x = 0.0
+        self.offset_y = 0.0
+
+    def is_identity(self):
+        return self.scale == 1.0 and self.offset_x == 0.0 and self.offset_y == 0.0
+
+    def to_screen(self, coords):
+        """Массив (N, 2) координат сцены -> координаты экрана"""
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        return coords * self.scale + (self.offset_x, self.offset_y)
+
+    def to_world(self, x, y):
+        """Точка экрана -> точка сцены"""
+        return (x - self.offset_x) / self.scale, (y - self.offset_y) / self.scale
+
+    def pan(self, dx, dy):
+        """Сдвинуть вид на (dx, dy) пикселей экрана"""
+        self.offset_x += dx
+        self.offset_y += dy
+
+    def zoom_at(self, factor, x, y):
+        """Изменить масштаб, оставив точку экрана (x, y) на месте; возвращает фактический множитель"""
+        scale = max(self.MIN_SCALE, min(self.scale * factor, self.MAX_SCALE))
+        factor = scale / self.scale
+        self.offset_x = x - (x - self.offset_x) * factor
+        self.offset_y = y - (y - self.offset_y) * factor
+        self.scale = scale
+        return factor
+
+    def reset(self):
+        self.scale = 1.0
+        self.offset_x = self.offset_y = 0.0
+
+    def visible_rect(self, width, height):
+        """Видимая область экрана (width x height) в координатах сцены"""
+        x0, y0 = self.to_world(0, 0)
+        x1, y1 = self.to_world(width, height)
+        return x0, y0, x1, y1
+
+    def detail(self, bounds):
+        """Уровень детализации объекта с границами bounds (в координатах сцены)"""
+        min_x, min_y, max_x, max_y = bounds
+        if max(max_x - min_x, max_y - min_y) * self.scale < self.OUTLINE_MAX_SIZE:
+            return self.OUTLINE
+        if self.scale < self.MARKERS_MIN_SCALE:
+            return self.CURVE
+        if self.scale < self.LABELS_MIN_SCALE:
+            return self.MARKERS
+        return self.FULL
+
+
+class ViewportCanvas:
+    """Обертка над canvas: элементы задаются в координатах сцены, а создаются в экранных"""
+
+    def __init__(self, canvas, viewport):
+        self.canvas = canvas
+        self.viewport = viewport
+
+    def __getattr__(self, name):
+        attr = getattr(self.canvas, name)
+        if not name.startswith("create_"):
+            return attr
+
+        def create(*args, **kwargs):
+            if self.viewport.is_identity():
+                return attr(*args, **kwargs)
+            coords = args[0] if len(args) == 1 else args
+            return attr(*self.viewport.to_screen(coords).ravel().tolist(), **kwargs)
+
+        return create
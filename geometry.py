@@ -0,0 +1,199 @@
+"""
+Компактное хранилище геометрии, общее для "2-5.py" и "3 новое": вершины
+полигонов и контрольные точки сплайнов лежат в одном массиве float64 (N, 2)
+внутри PointArray, а не в отдельных объектах Point.
+
+Пример:
+    points = PointArray([Point(0, 0), Point(10, 5)])
+    points.append(Point(20, 0))
+    points[1].y += 1           # PointView меняет координату прямо в массиве
+    coords = points.array()    # представление (N, 2) без копирования
+"""
+import math
+
+import numpy as np
+
+
+class Point:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def transform(self, dx=0, dy=0, angle=0, pivot=None):
+        """Преобразование точки (перенос + поворот)"""
+        x_new = self.x + dx
+        y_new = self.y + dy
+
+        if angle != 0 and pivot:
+            x_rel = x_new - pivot.x
+            y_rel = y_new - pivot.y
+
+            rad = math.radians(angle)
+            cos_a = math.cos(rad)
+            sin_a = math.sin(rad)
+
+            x_rot = x_rel * cos_a - y_rel * sin_a
+            y_rot = x_rel * sin_a + y_rel * cos_a
+
+            x_new = x_rot + pivot.x
+            y_new = y_rot + pivot.y
+
+        return Point(x_new, y_new)
+
+
+class PointView:
+    """Легкое представление точки внутри PointArray (без собственной копии координат)"""
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def x(self):
+        return float(self.store.buffer[self.index, 0])
+
+    @x.setter
+    def x(self, value):
+        self.store.buffer[self.index, 0] = value
+
+    @property
+    def y(self):
+        return float(self.store.buffer[self.index, 1])
+
+    @y.setter
+    def y(self, value):
+        self.store.buffer[self.index, 1] = value
+
+
+class PointArray:
+    """
+    Компактное хранилище точек: непрерывный массив float64 формы (capacity, 2)
+    с амортизированным добавлением в конец. Индексация и перебор возвращают
+    PointView, поэтому код, работающий с point.x / point.y, не меняется,
+    а массовые операции выполняются прямо над array().
+    """
+    __slots__ = ("buffer", "count")
+
+    def __init__(self, points=None):
+        self.buffer = np.empty((8, 2))
+        self.count = 0
+        if points is not None:
+            self.extend(points)
+
+    @classmethod
+    def from_array(cls, coords):
+        """Создать хранилище из массива (N, 2) (данные копируются)"""
+        store = cls()
+        store.set_array(coords)
+        return store
+
+    @classmethod
+    def wrap(cls, coords):
+        """
+        Хранилище поверх готового массива (N, 2) float64 без копирования
+        (например, поверх отображенного в память файла). Копия делается
+        только при первом добавлении точки, когда буфер нужно расширить.
+        """
+        store = cls.__new__(cls)
+        store.buffer = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        store.count = len(store.buffer)
+        return store
+
+    def array(self):
+        """Координаты в виде массива (N, 2) - представление без копирования"""
+        return self.buffer[:self.count]
+
+    def set_array(self, coords):
+        """Заменить все точки координатами из массива (N, 2)"""
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.reserve(len(coords))
+        self.buffer[:len(coords)] = coords
+        self.count = len(coords)
+
+    def tuples(self):
+        """Список кортежей (x, y)"""
+        return [tuple(coord) for coord in self.array().tolist()]
+
+    def flat(self):
+        """Плоский список [x0, y0, x1, y1, ...] для методов canvas"""
+        return self.array().ravel().tolist()
+
+    def reserve(self, capacity):
+        if capacity > len(self.buffer):
+            buffer = np.empty((max(capacity, 2 * len(self.buffer)), 2))
+            buffer[:self.count] = self.buffer[:self.count]
+            self.buffer = buffer
+
+    def append(self, point):
+        self.reserve(self.count + 1)
+        self.buffer[self.count] = (point.x, point.y)
+        self.count += 1
+
+    def extend(self, points):
+        if isinstance(points, PointArray):
+            coords = points.array()
+        elif isinstance(points, np.ndarray):
+            coords = points.reshape(-1, 2)
+        else:
+            coords = [(point.x, point.y) for point in points]
+        if len(coords):
+            coords = np.asarray(coords, dtype=np.float64)
+            self.reserve(self.count + len(coords))
+            self.buffer[self.count:self.count + len(coords)] = coords
+            self.count += len(coords)
+
+    def pop(self, index=-1):
+        """Удалить точку и вернуть ее копию в виде Point"""
+        index = self.normalize_index(index)
+        point = Point(*self.buffer[index].tolist())
+        del self[index]
+        return point
+
+    def clear(self):
+        self.count = 0
+
+    def copy(self):
+        return PointArray.from_array(self.array())
+
+    def normalize_index(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("PointArray index out of range")
+        return index
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield PointView(self, index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PointArray.from_array(self.array()[index])
+        return PointView(self, self.normalize_index(index))
+
+    def __setitem__(self, index, point):
+        self.buffer[self.normalize_index(index)] = (point.x, point.y)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            indices = range(self.count)[index]
+            if not len(indices):
+                return
+            if indices.step == 1 and indices.stop == self.count:
+                # Быстрый путь: удаление хвоста
+                self.count = indices.start
+                return
+            keep = np.ones(self.count, dtype=bool)
+            keep[list(indices)] = False
+        else:
+            keep = np.ones(self.count, dtype=bool)
+            keep[self.normalize_index(index)] = False
+        remaining = self.array()[keep]
+        self.buffer[:len(remaining)] = remaining
+        self.count = len(remaining)
@@ -0,0 +1,71 @@
+"""
+История изменений для отмены и повтора, общая для "2-5.py" и "3 новое".
+Команда - пара замыканий do/undo над самим изменением, а не копия сцены.
+
+Пример:
+    history = History()
+    history.execute("Добавлена точка", lambda: spline.add_control_point(point),
+                    spline.remove_last_control_point)
+    history.undo()
+"""
+from collections import deque
+
+
+class Command:
+    """
+    Обратимое изменение сцены: do выполняет (и повторяет) его, undo - отменяет.
+    Команда хранит только само изменение (точку, ссылку на сплайн, прежние
+    вершины одной фигуры), а не копию сцены, поэтому и отмена, и повтор
+    стоят O(размер изменения).
+    """
+
+    def __init__(self, name, do, undo):
+        self.name = name
+        self.do = do
+        self.undo = undo
+
+
+class History:
+    """
+    История команд для отмены и повтора. Хранится не больше LIMIT последних
+    команд - самые старые вытесняются, поэтому память ограничена даже в очень
+    длинных сеансах. Новая команда очищает цепочку повтора.
+    """
+    LIMIT = 100000
+
+    def __init__(self, limit=LIMIT):
+        self.done = deque(maxlen=limit)
+        self.undone = []
+
+    def execute(self, name, do, undo):
+        """Выполнить изменение и записать его в историю; возвращает результат do()"""
+        result = do()
+        self.record(name, do, undo)
+        return result
+
+    def record(self, name, do, undo):
+        """Записать уже выполненное изменение"""
+        self.done.append(Command(name, do, undo))
+        self.undone.clear()
+
+    def undo(self):
+        """Отменить последнюю команду; возвращает ее или None, если отменять нечего"""
+        if not self.done:
+            return None
+        command = self.done.pop()
+        command.undo()
+        self.undone.append(command)
+        return command
+
+    def redo(self):
+        """Повторить последнюю отмененную команду; возвращает ее или None"""
+        if not self.undone:
+            return None
+        command = self.undone.pop()
+        command.do()
+        self.done.append(command)
+        return command
+
+    def clear(self):
+        self.done.clear()
+        self.undone.clear()
@@ -0,0 +1,277 @@
+"""
+Внеэкранная отрисовка без Tk: OffscreenCanvas повторяет ту часть API
+tkinter.Canvas, которую используют методы draw/show фигур и сплайнов
+(create_line, create_polygon, create_oval, create_rectangle, create_text,
+create_image), и рисует в изображение PIL произвольного разрешения.
+Заливка полигонов идет через отрезки сканирующей строки (scanline.py),
+цвета в записи Tk (например, "gray90") переводятся в RGB функцией tk_color.
+
+Пример:
+    canvas = OffscreenCanvas(600, 400, scale=2)
+    spline.draw(canvas)
+    canvas.save("scene.bmp")
+"""
+import functools
+import re
+
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+from scanline import scanline_spans
+
+
+# Кэш шрифтов: (семейство, размер в пикселях) -> ImageFont
+_FONT_CACHE = {}
+
+
+@functools.lru_cache(maxsize=256)
+def tk_color(color):
+    """
+    Цвет в записи Tk -> (r, g, b) для PIL; пустая строка (нет цвета) -> None.
+    Кроме имен и #rgb, которые PIL понимает сам, поддерживаются оттенки
+    серого X11 gray0..gray100 (grey...), имена с пробелами ("light gray")
+    и #rrrgggbbb / #rrrrggggbbbb (от каждого канала берется старший байт).
+    """
+    if not color:
+        return None
+    name = color.replace(" ", "")
+    match = re.fullmatch(r"gr[ae]y(\d{1,3})", name, re.IGNORECASE)
+    if match and int(match.group(1)) <= 100:
+        level = int(int(match.group(1)) * 2.55 + 0.5)
+        return level, level, level
+    if re.fullmatch(r"#(?:[0-9a-fA-F]{9}|[0-9a-fA-F]{12})", name):
+        digits = (len(name) - 1) // 3
+        return tuple(int(name[1 + channel * digits:3 + channel * digits], 16) for channel in range(3))
+    try:
+        return ImageColor.getrgb(name)[:3]
+    except ValueError:
+        raise ValueError(f"Цвет Tk не поддерживается при отрисовке без Tk: {color!r}") from None
+
+
+def flatten_coords(args):
+    """Координаты в любом виде, который принимает Tk (x0, y0, ... / [(x, y), ...]) -> массив (N, 2)"""
+    if len(args) == 1:
+        args = args[0]
+    coords = np.asarray(args, dtype=np.float64)
+    return coords.reshape(-1, 2)
+
+
+def smooth_polyline(coords, steps=12):
+    """
+    Сглаживание ломаной так же, как это делает Tk при smooth=True:
+    квадратичные кривые Безье с вершинами ломаной в роли контрольных точек,
+    проходящие через середины звеньев (и через концы ломаной)
+    """
+    if len(coords) < 3:
+        return coords
+
+    controls = coords[1:-1]
+    starts = (coords[:-2] + coords[1:-1]) / 2
+    ends = (coords[1:-1] + coords[2:]) / 2
+    starts[0] = coords[0]
+    ends[-1] = coords[-1]
+
+    t = np.linspace(0.0, 1.0, steps + 1)[:, None, None]
+    curve = ((1 - t) ** 2 * starts + 2 * (1 - t) * t * controls + t ** 2 * ends)
+    # (steps + 1, сегменты, 2) -> точки сегментов подряд, без повтора общих концов
+    curve = curve.transpose(1, 0, 2)
+    return np.concatenate([curve[0], curve[1:, 1:].reshape(-1, 2)])
+
+
+def dash_polyline(coords, pattern):
+    """Разбить ломаную на штрихи по шаблону Tk dash (длины штрихов и пробелов в пикселях)"""
+    pattern = [length for length in pattern if length > 0]
+    if not pattern or len(coords) < 2:
+        return [coords]
+    if len(pattern) % 2:
+        pattern = pattern * 2
+
+    segment_lengths = np.hypot(*np.diff(coords, axis=0).T)
+    distances = np.concatenate([[0.0], np.cumsum(segment_lengths)])
+    total = distances[-1]
+
+    def point_at(distance):
+        index = min(np.searchsorted(distances, distance, side="right") - 1, len(segment_lengths) - 1)
+        length = segment_lengths[index]
+        ratio = (distance - distances[index]) / length if length else 0.0
+        return coords[index] + (coords[index + 1] - coords[index]) * ratio
+
+    dashes = []
+    position = 0.0
+    index = 0
+    while position < total:
+        end = min(position + pattern[index % len(pattern)], total)
+        if index % 2 == 0:
+            inner = coords[1:-1][(distances[1:-1] > position) & (distances[1:-1] < end)]
+            dashes.append(np.vstack([point_at(position), inner, point_at(end)]))
+        position = end
+        index += 1
+    return dashes
+
+
+class OffscreenCanvas:
+    """
+    Растровая замена tkinter.Canvas для работы без дисплея.
+    width, height - логический размер сцены; scale - во сколько раз
+    итоговое изображение больше логического размера.
+    """
+
+    def __init__(self, width, height, scale=1.0, background="white"):
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.background = tk_color(background)
+        self.image = Image.new("RGB", (max(1, round(width * scale)), max(1, round(height * scale))),
+                               self.background)
+        self.draw = ImageDraw.Draw(self.image)
+        self.item_count = 0
+
+    # ----- служебные методы -----
+    def next_item(self):
+        self.item_count += 1
+        return self.item_count
+
+    def to_pixels(self, coords):
+        return [tuple(point) for point in (np.asarray(coords) * self.scale).tolist()]
+
+    def pixel_width(self, width):
+        return max(1, round(float(width) * self.scale))
+
+    def load_font(self, font):
+        """Шрифт Tk вида ("Arial", 9, "bold") -> ImageFont нужного размера"""
+        family, size = "DejaVuSans", 10
+        if isinstance(font, (tuple, list)) and font:
+            family = font[0]
+            if len(font) > 1:
+                size = abs(int(font[1]))
+            if "bold" in font[2:]:
+                family += "-Bold"
+        pixel_size = max(1, round(size * 1.33 * self.scale))
+
+        key = (family, pixel_size)
+        if key not in _FONT_CACHE:
+            for name in (family + ".ttf", family.lower() + ".ttf", "DejaVuSans.ttf"):
+                try:
+                    _FONT_CACHE[key] = ImageFont.truetype(name, pixel_size)
+                    break
+                except OSError:
+                    continue
+            else:
+                _FONT_CACHE[key] = ImageFont.load_default()
+        return _FONT_CACHE[key]
+
+    # ----- API, совместимый с tkinter.Canvas -----
+    def create_line(self, *args, fill="black", width=1, dash=None, smooth=False, **kwargs):
+        coords = flatten_coords(args)
+        fill = tk_color(fill)
+        if fill is None:
+            return self.next_item()
+        if smooth:
+            coords = smooth_polyline(coords)
+        pixel_width = self.pixel_width(width)
+        pieces = dash_polyline(coords, [length * self.scale for length in dash]) if dash else [coords]
+        for piece in pieces:
+            if len(piece) >= 2:
+                self.draw.line(self.to_pixels(piece), fill=fill, width=pixel_width, joint="curve")
+        return self.next_item()
+
+    def fill_spans(self, spans, fill):
+        """
+        Залить цветом отрезки сканирующей строки (SpanList в пикселях изображения):
+        маска строится только в габаритах отрезков и накладывается одной операцией
+        """
+        fill = tk_color(fill)
+        x0, y0, x1, y1 = spans.bounds()
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.image.width), min(y1, self.image.height)
+        if x1 > x0 and y1 > y0:
+            mask = Image.fromarray(spans.mask(x1 - x0, y1 - y0, (x0, y0)), "L")
+            self.image.paste(fill, (x0, y0, x1, y1), mask)
+
+    def create_polygon(self, *args, fill="black", outline="", width=1, **kwargs):
+        points = flatten_coords(args)
+        coords = self.to_pixels(points)
+        if len(coords) >= 2:
+            if fill:
+                self.fill_spans(scanline_spans(points * self.scale), fill)
+            if outline:
+                self.draw.line(coords + coords[:1], fill=tk_color(outline), width=self.pixel_width(width), joint="curve")
+        return self.next_item()
+
+    def create_oval(self, x0, y0, x1, y1, fill="", outline="black", width=1, **kwargs):
+        box = self.to_pixels([(x0, y0), (x1, y1)])
+        self.draw.ellipse(box, fill=tk_color(fill), outline=tk_color(outline), width=self.pixel_width(width))
+        return self.next_item()
+
+    def create_rectangle(self, x0, y0, x1, y1, fill="", outline="black", width=1, **kwargs):
+        box = self.to_pixels([(min(x0, x1), min(y0, y1)), (max(x0, x1), max(y0, y1))])
+        self.draw.rectangle(box, fill=tk_color(fill), outline=tk_color(outline), width=self.pixel_width(width))
+        return self.next_item()
+
+    def create_text(self, x, y, text="", fill="black", font=None, anchor="center", **kwargs):
+        anchors = {"center": "mm", "n": "mt", "s": "mb", "e": "rm", "w": "lm",
+                   "nw": "lt", "ne": "rt", "sw": "lb", "se": "rb"}
+        position = (x * self.scale, y * self.scale)
+        font = self.load_font(font)
+        try:
+            self.draw.text(position, str(text), fill=tk_color(fill), font=font, anchor=anchors.get(anchor, "mm"))
+        except ValueError:
+            # Растровые шрифты по умолчанию не поддерживают привязку
+            self.draw.text(position, str(text), fill=tk_color(fill), font=font)
+        return self.next_item()
+
+    def create_image(self, x, y, image=None, anchor="center", **kwargs):
+        """Вывести изображение PIL (объекты PhotoImage без Tk недоступны)"""
+        if image is not None:
+            if self.scale != 1:
+                image = image.resize((max(1, round(image.width * self.scale)),
+                                      max(1, round(image.height * self.scale))))
+            px, py = x * self.scale, y * self.scale
+            if anchor == "center":
+                px -= image.width / 2
+                py -= image.height / 2
+            box = (round(px), round(py))
+            if image.mode == "RGBA":
+                self.image.paste(image, box, image)
+            else:
+                self.image.paste(image, box)
+        return self.next_item()
+
+    def delete(self, *tags):
+        if "all" in tags:
+            self.draw.rectangle([(0, 0), self.image.size], fill=self.background)
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def canvasx(self, x):
+        return x
+
+    def canvasy(self, y):
+        return y
+
+    # ----- результат -----
+    def to_array(self):
+        """Изображение в виде массива (height, width, 3) uint8"""
+        return np.asarray(self.image)
+
+    def save(self, path, format=None):
+        """Сохранить изображение; формат определяется расширением (BMP, PNG, ...)"""
+        self.image.save(path, format=format)
+        return path
+
+
+def render_offscreen(drawables, width, height, scale=1.0, background="white"):
+    """
+    Нарисовать объекты без Tk: каждый объект должен иметь метод draw(canvas)
+    или show(canvas). Возвращает изображение PIL.
+    """
+    canvas = OffscreenCanvas(width, height, scale=scale, background=background)
+    for drawable in drawables:
+        draw = getattr(drawable, "draw", None) or getattr(drawable, "show")
+        draw(canvas)
+    return canvas.image
+
@@ -1,11 +1,22 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Сопоставление закрывающих скобок с открывающими
+BRACKETS = {')': '(', '}': '{', ']': '['}
+OPENING = frozenset(BRACKETS.values())
+
+
 def is_valid_brackets(s: str) -> bool:
 
     stack = []
     # Сопоставление закрывающих скобок с открывающими
-    mapping = {')': '(', '}': '{', ']': '['}
+    mapping = BRACKETS
 
     for char in s:
-        if char in mapping.values():  # открывающая скобка
+        if char in OPENING:  # открывающая скобка (множество - проверка за O(1))
             stack.append(char)
         elif char in mapping:  # закрывающая скобка
             if not stack or stack[-1] != mapping[char]:
@@ -16,3 +27,266 @@ def is_valid_brackets(s: str) -> bool:
             return False
 
     return not stack  # True, если стек пуст (все открывающие закрыты)
+
+
+# =============================================================================
+# ПОТОКОВАЯ ПРОВЕРКА БОЛЬШИХ ФАЙЛОВ
+# =============================================================================
+
+# Правила для остальных символов (не скобок):
+#   "skip"       - пропускать любые;
+#   "whitespace" - пропускать только пробельные, остальные - ошибка;
+#   "strict"     - любой другой символ - ошибка (как в is_valid_brackets).
+POLICIES = ("skip", "whitespace", "strict")
+
+INVALID = 4  # код недопустимого символа в таблице классов
+CHUNK_SIZE = 1 << 24
+
+
+def byte_classes(policy: str) -> np.ndarray:
+    """
+    Таблица классов байтов: 1..3 - открывающие скобки, -1..-3 - закрывающие
+    того же типа, INVALID - недопустимый символ, 0 - пропускаемый.
+    Байты скобок ASCII не встречаются внутри многобайтовых символов UTF-8,
+    поэтому файл можно проверять побайтно.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Неизвестное правило для символов: {policy}")
+    classes = np.full(256, INVALID if policy != "skip" else 0, dtype=np.int8)
+    if policy == "whitespace":
+        classes[list(b" \t\r\n\f\v")] = 0
+    for kind, (closing, opening) in enumerate(BRACKETS.items(), start=1):
+        classes[ord(opening)] = kind
+        classes[ord(closing)] = -kind
+    return classes
+
+
+class BracketResult:
+    """
+    Итог проверки: valid и, при ошибке, offset (смещение в байтах) и причина:
+    "mismatch" - закрывающая скобка не того типа, "unexpected" - закрывающая
+    без открывающей, "invalid" - недопустимый символ, "unclosed" - открывающая
+    скобка осталась незакрытой (offset - самая внешняя из таких).
+    """
+
+    MESSAGES = {
+        "mismatch": "закрывающая скобка не совпадает с открывающей",
+        "unexpected": "закрывающая скобка без открывающей",
+        "invalid": "недопустимый символ",
+        "unclosed": "открывающая скобка не закрыта",
+    }
+
+    def __init__(self, valid: bool, offset: int = None, reason: str = None):
+        self.valid = valid
+        self.offset = offset
+        self.reason = reason
+
+    def __bool__(self):
+        return self.valid
+
+    def __repr__(self):
+        if self.valid:
+            return "BracketResult(valid)"
+        return f"BracketResult({self.reason} at {self.offset})"
+
+    def message(self) -> str:
+        if self.valid:
+            return "Скобки расставлены правильно"
+        return f"Ошибка в позиции {self.offset}: {self.MESSAGES[self.reason]}"
+
+
+class ChunkSummary:
+    """
+    Свертка куска данных: несовпавшие закрывающие скобки (которым нужна пара
+    из предыдущих кусков) и несовпавшие открывающие (для следующих кусков) -
+    смещения и типы, - а также первая ошибка, найденная внутри куска.
+    Пары скобок внутри куска сопоставляются независимо от соседних кусков.
+    """
+
+    def __init__(self, closer_offsets, closer_kinds, opener_offsets, opener_kinds, error=None):
+        self.closer_offsets = closer_offsets
+        self.closer_kinds = closer_kinds
+        self.opener_offsets = opener_offsets
+        self.opener_kinds = opener_kinds
+        self.error = error  # (смещение, причина) или None
+
+
+def summarize_chunk(data, base: int = 0, policy: str = "skip", classes: np.ndarray = None) -> ChunkSummary:
+    """
+    Свертка куска (bytes, memoryview или массив uint8), который начинается со
+    смещения base. Все вычисления векторные: глубина вложенности - накопленная
+    сумма, несовпавшие скобки - по префиксному и суффиксному минимуму глубины,
+    пары - соседние скобки одного уровня после устойчивой сортировки по уровню.
+    """
+    if classes is None:
+        classes = byte_classes(policy)
+    codes = np.frombuffer(data, dtype=np.uint8)
+    kinds = classes[codes]
+
+    errors = []
+    if policy != "skip":
+        invalid = np.flatnonzero(kinds == INVALID)
+        if len(invalid):
+            errors.append((base + int(invalid[0]), "invalid"))
+            kinds = kinds[:invalid[0]]  # дальше первой ошибки смотреть незачем
+
+    positions = np.flatnonzero(kinds)
+    kinds = kinds[positions]
+    opening = kinds > 0
+    depth_after = np.cumsum(np.where(opening, np.int32(1), np.int32(-1)), dtype=np.int32)
+    # Уровень пары: глубина до открывающей скобки и после закрывающей
+    level = depth_after - opening
+
+    # Закрывающая без пары в куске - та, что опускает глубину ниже прежнего минимума (и нуля)
+    prefix_min = np.empty_like(depth_after)
+    prefix_min[:1] = 0
+    np.minimum(np.minimum.accumulate(depth_after[:-1]), 0, out=prefix_min[1:])
+    unmatched_closers = ~opening & (depth_after < prefix_min)
+    # Открывающая без пары - после нее глубина больше не возвращается к ее уровню
+    later_min = np.empty_like(depth_after)
+    later_min[-1:] = np.iinfo(np.int32).max
+    later_min[:-1] = np.minimum.accumulate(depth_after[:0:-1])[::-1]
+    unmatched_openers = opening & (later_min > level)
+
+    # Остальные скобки образуют правильную вложенность: на каждом уровне
+    # открывающие и закрывающие чередуются, пары - соседи после сортировки по уровню
+    unmatched = unmatched_closers | unmatched_openers
+    matched = np.flatnonzero(~unmatched) if unmatched.any() else None
+    matched_level = level if matched is None else level[matched]
+    if len(matched_level):
+        matched_level = matched_level - matched_level.min()
+        if matched_level.max() < np.iinfo(np.int16).max:
+            matched_level = matched_level.astype(np.int16)  # для 16 бит устойчивая сортировка - поразрядная
+        order = np.argsort(matched_level, kind="stable")
+        if matched is not None:
+            order = matched[order]
+        openers, closers = order[0::2], order[1::2]
+        wrong = kinds[openers] != -kinds[closers]
+        if wrong.any():
+            errors.append((base + int(positions[closers[wrong]].min()), "mismatch"))
+
+    return ChunkSummary(base + positions[unmatched_closers], -kinds[unmatched_closers],
+                        base + positions[unmatched_openers], kinds[unmatched_openers],
+                        min(errors) if errors else None)
+
+
+class BracketStack:
+    """Стек несовпавших открывающих скобок между кусками (смещения и типы в растущих массивах)"""
+
+    def __init__(self):
+        self.offsets = np.empty(1024, dtype=np.int64)
+        self.kinds = np.empty(1024, dtype=np.int8)
+        self.count = 0
+
+    def push(self, offsets, kinds):
+        needed = self.count + len(offsets)
+        if needed > len(self.offsets):
+            capacity = max(needed, 2 * len(self.offsets))
+            self.offsets = np.resize(self.offsets, capacity)
+            self.kinds = np.resize(self.kinds, capacity)
+        self.offsets[self.count:needed] = offsets
+        self.kinds[self.count:needed] = kinds
+        self.count = needed
+
+    def combine(self, summary: ChunkSummary):
+        """
+        Применить свертку следующего куска: закрывающие скобки куска снимают
+        открывающие с вершины стека. Возвращает первую ошибку (смещение, причина) или None.
+        """
+        errors = [summary.error] if summary.error else []
+        closers = len(summary.closer_kinds)
+        matched = min(closers, self.count)
+        if closers > self.count:
+            errors.append((int(summary.closer_offsets[self.count]), "unexpected"))
+        if matched:
+            # Вершина стека (в обратном порядке) против закрывающих куска по порядку
+            top = self.kinds[self.count - matched:self.count][::-1]
+            wrong = np.flatnonzero(top != summary.closer_kinds[:matched])
+            if len(wrong):
+                errors.append((int(summary.closer_offsets[wrong[0]]), "mismatch"))
+        self.count -= matched
+        self.push(summary.opener_offsets, summary.opener_kinds)
+        return min(errors) if errors else None
+
+    def result(self):
+        """Итог после последнего куска"""
+        if self.count:
+            return BracketResult(False, int(self.offsets[0]), "unclosed")
+        return BracketResult(True)
+
+
+def iter_chunks(stream, chunk_size: int = CHUNK_SIZE):
+    """Куски двоичного потока: (смещение, данные)"""
+    offset = 0
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            return
+        yield offset, data
+        offset += len(data)
+
+
+def validate_brackets_stream(stream, chunk_size: int = CHUNK_SIZE, policy: str = "skip") -> BracketResult:
+    """Проверить скобки в двоичном потоке, читая его кусками по chunk_size байт"""
+    classes = byte_classes(policy)
+    stack = BracketStack()
+    for offset, data in iter_chunks(stream, chunk_size):
+        error = stack.combine(summarize_chunk(data, offset, policy, classes))
+        if error:
+            return BracketResult(False, *error)
+    return stack.result()
+
+
+def summarize_file_chunk(path: str, start: int, length: int, policy: str) -> ChunkSummary:
+    """Свертка куска файла (выполняется в процессе пула - файл читается там же)"""
+    with open(path, "rb") as file:
+        file.seek(start)
+        return summarize_chunk(file.read(length), start, policy)
+
+
+def validate_brackets_file(path: str, chunk_size: int = CHUNK_SIZE, policy: str = "skip",
+                           workers: int = None) -> BracketResult:
+    """
+    Проверить скобки в файле любого размера. workers = 1 - последовательное
+    чтение кусками; иначе куски сворачиваются параллельно в пуле процессов
+    (None - по числу ядер), а свертки объединяются по порядку в этом процессе.
+    """
+    byte_classes(policy)  # проверка правила до запуска пула
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        with open(path, "rb") as file:
+            return validate_brackets_stream(file, chunk_size, policy)
+
+    size = os.path.getsize(path)
+    stack = BracketStack()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # В работе не больше 2 * workers кусков, чтобы свертки не копились в памяти
+        pending = []
+        starts = iter(range(0, size, chunk_size))
+        for start in starts:
+            pending.append(executor.submit(summarize_file_chunk, path, start, chunk_size, policy))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            summary = pending.pop(0).result()
+            error = stack.combine(summary)
+            if error:
+                for future in pending:
+                    future.cancel()
+                return BracketResult(False, *error)
+            start = next(starts, None)
+            if start is not None:
+                pending.append(executor.submit(summarize_file_chunk, path, start, chunk_size, policy))
+    return stack.result()
+
+
+if __name__ == "__main__":
+    # python main.py <файл> [число процессов] [skip | whitespace | strict]
+    if len(sys.argv) < 2:
+        print("Использование: python main.py <файл> [число процессов] [skip | whitespace | strict]")
+        sys.exit(2)
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    policy = sys.argv[3] if len(sys.argv) > 3 else "skip"
+    result = validate_brackets_file(sys.argv[1], policy=policy, workers=workers)
+    print(result.message())
+    sys.exit(0 if result else 1)
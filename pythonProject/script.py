@@ -1,12 +1,237 @@
+import sys
+import time
+
+import numpy as np
+
+# =============================================================================
+# ПРАВИЛА IIN (ПРЕФИКС НОМЕРА -> ПЛАТЕЖНАЯ СИСТЕМА)
+# =============================================================================
+
+ISSUERS = ("Unknown", "AMEX", "Discover", "Mastercard", "VISA")
+
+# (префикс, допустимые длины номера, платежная система)
+IIN_RULES = [
+    ("34", (15,), "AMEX"),
+    ("37", (15,), "AMEX"),
+    ("6011", (16,), "Discover"),
+    ("51", (16,), "Mastercard"),
+    ("52", (16,), "Mastercard"),
+    ("53", (16,), "Mastercard"),
+    ("54", (16,), "Mastercard"),
+    ("55", (16,), "Mastercard"),
+    ("4", (13, 16), "VISA"),
+]
+
+MAX_DIGITS = 19  # самый длинный номер карты (PAN)
+FIELD_WIDTH = 32  # ширина поля с номером в CSV (с пробелами и дефисами)
+
+
+class IssuerTable:
+    """
+    Правила, скомпилированные в таблицу диапазонов: для каждой длины номера
+    массив по первым prefix_digits цифрам хранит код платежной системы.
+    Префикс из k цифр занимает диапазон [p * 10^(D - k), (p + 1) * 10^(D - k)),
+    более длинные префиксы записываются позже и перекрывают короткие.
+    """
+
+    def __init__(self, rules=IIN_RULES):
+        self.prefix_digits = max(len(prefix) for prefix, _, _ in rules)
+        self.table = np.zeros((MAX_DIGITS + 1, 10 ** self.prefix_digits), dtype=np.uint8)
+        for prefix, lengths, issuer in sorted(rules, key=lambda rule: len(rule[0])):
+            scale = 10 ** (self.prefix_digits - len(prefix))
+            start = int(prefix) * scale
+            for length in lengths:
+                self.table[length, start:start + scale] = ISSUERS.index(issuer)
+
+    def classify(self, digits, lengths):
+        """Коды платежных систем для матрицы цифр (N, MAX_DIGITS), выровненных по левому краю"""
+        prefix = np.zeros(len(lengths), dtype=np.int64)
+        for column in range(self.prefix_digits):
+            prefix = prefix * 10 + digits[:, column]
+        # Номера короче префикса таблицы ни под одно правило не подходят (длина 0 - пустая строка таблицы)
+        lengths = np.where(lengths >= self.prefix_digits, lengths, 0)
+        return self.table[lengths, prefix]
+
+    def lookup(self, number):
+        """Платежная система для одного номера"""
+        n = "".join(char for char in str(number) if char.isdigit())
+        if not self.prefix_digits <= len(n) <= MAX_DIGITS:
+            return ISSUERS[0]
+        return ISSUERS[self.table[len(n), int(n[:self.prefix_digits])]]
+
+
+IIN_TABLE = IssuerTable()
+
+
 def get_issuer(number):
-    n=str(number)
-    if (n[:2] in '34' or n[:2] in '37') and len(n)==15:
-        print('AMEX')
-    elif n[:4] in '6011' and len(n)==16:
-        print('Discover')
-    elif (n[:2] in '51' or n[:2] in '52' or n[:2] in '53' or n[:2] in '54' or n[:2] in '55') and len(n)==16:
-        print('Mastercard ')
-    elif (n[0]=='4' and (len(n)==13 or len(n)==16)):
-        print('VISA')
-    else:print('Unknown')
-get_issuer(6011783664441608)
\ No newline at end of file
+    """Платежная система по номеру карты (префикс сравнивается с началом номера, а не как подстрока)"""
+    return IIN_TABLE.lookup(number)
+
+
+# =============================================================================
+# ПАКЕТНАЯ ОБРАБОТКА: ЦИФРЫ, АЛГОРИТМ ЛУНА
+# =============================================================================
+
+# Удвоенная цифра по алгоритму Луна: 2d, а если больше 9 - минус 9
+LUHN_DOUBLE = np.array([0, 2, 4, 6, 8, 1, 3, 5, 7, 9], dtype=np.uint8)
+
+
+def digit_matrix(fields):
+    """
+    Поля с номерами (массив байтовых строк фиксированной ширины) -> матрица
+    цифр (N, MAX_DIGITS), выровненных по левому краю, и длины номеров.
+    Пробелы, дефисы, кавычки и прочие не-цифры отбрасываются.
+    """
+    fields = np.asarray(fields)
+    if fields.dtype.kind != "S":
+        fields = fields.astype(f"S{FIELD_WIDTH}")
+    codes = fields.view(np.uint8).reshape(len(fields), -1)
+    digits = codes - np.uint8(48)
+    is_digit = digits < 10
+    lengths = is_digit.sum(axis=1)
+
+    # Обычно поле - это только цифры от начала строки; сжимать нужно лишь остальные
+    digits = np.where(is_digit, digits, np.uint8(0))
+    dirty = np.flatnonzero((is_digit != (np.arange(codes.shape[1]) < lengths[:, None])).any(axis=1))
+    if len(dirty):
+        # Сжатие цифр влево: позиция цифры в номере - число цифр перед ней
+        rows, columns = np.nonzero(is_digit[dirty])
+        positions = np.cumsum(is_digit[dirty], axis=1)[rows, columns] - 1
+        packed = np.zeros((len(dirty), codes.shape[1]), dtype=np.uint8)
+        packed[rows, positions] = digits[dirty[rows], columns]
+        digits[dirty] = packed
+    if codes.shape[1] < MAX_DIGITS:
+        digits = np.pad(digits, ((0, 0), (0, MAX_DIGITS - codes.shape[1])))
+    return digits[:, :MAX_DIGITS], lengths
+
+
+def luhn_valid(digits, lengths):
+    """Проверка контрольной суммы Луна для всех номеров сразу"""
+    # Удваивается каждая вторая цифра с конца, т.е. столбцы той же четности, что и длина
+    # номера; после конца номера стоят нули, поэтому обе суммы считаются по всей матрице
+    doubled = LUHN_DOUBLE[digits]
+    even_doubled = doubled[:, 0::2].sum(axis=1, dtype=np.int32) + digits[:, 1::2].sum(axis=1, dtype=np.int32)
+    odd_doubled = digits[:, 0::2].sum(axis=1, dtype=np.int32) + doubled[:, 1::2].sum(axis=1, dtype=np.int32)
+    total = np.where(lengths % 2 == 0, even_doubled, odd_doubled)
+    return (total % 10 == 0) & (lengths > 0)
+
+
+def classify_batch(fields, table=IIN_TABLE):
+    """
+    Классификация пачки номеров: возвращает коды платежных систем
+    (индексы в ISSUERS) и маску номеров с верной контрольной суммой.
+    Номера длиннее MAX_DIGITS цифр считаются неизвестными.
+    """
+    digits, lengths = digit_matrix(fields)
+    lengths = np.where(lengths <= MAX_DIGITS, lengths, 0)
+    return table.classify(digits, lengths), luhn_valid(digits, lengths)
+
+
+# =============================================================================
+# ПОТОКОВОЕ ЧТЕНИЕ CSV
+# =============================================================================
+
+def csv_field(line, delimiter, column):
+    """Поле column строки CSV (bytes) или None для пустой строки и строки без этого столбца"""
+    row = line.split(delimiter, column + 1)
+    return row[column] if len(row) > column and line.strip() else None
+
+
+def iter_csv_fields(path, column=0, delimiter=",", header=False, chunk_size=1 << 23):
+    """
+    Поля столбца column из CSV кусками примерно по chunk_size байт: выдает
+    массивы байтовых строк. Файл читается блоками, неполная последняя строка
+    блока переносится в следующий. Кавычки внутри полей не разбираются -
+    в файлах с номерами карт разделитель внутри поля не встречается.
+    Пустые строки и строки, в которых нет столбца column, пропускаются.
+    Поле длиннее FIELD_WIDTH байт - ошибка ValueError с номером строки
+    (обрезанное поле могло бы дать чужой номер).
+    """
+    delimiter = delimiter.encode()
+    tail = b""
+    line_number = 0  # номер последней прочитанной строки файла
+    with open(path, "rb") as file:
+        while True:
+            block = file.read(chunk_size)
+            data = tail + block
+            if block:
+                cut = data.rfind(b"\n") + 1
+                data, tail = data[:cut], data[cut:]
+            lines = data.splitlines()
+            first_line = line_number + 1
+            line_number += len(lines)
+            if header and lines:
+                lines = lines[1:]
+                first_line += 1
+                header = False
+            fields = [csv_field(line, delimiter, column) for line in lines]
+            # Ширину строк numpy выбирает по самому длинному полю - так длинные поля не обрезаются молча
+            array = np.array([field for field in fields if field is not None], dtype=bytes)
+            if array.dtype.itemsize > FIELD_WIDTH:
+                too_long = next(index for index, field in enumerate(fields)
+                                if field is not None and len(field) > FIELD_WIDTH)
+                raise ValueError(f"{path}: строка {first_line + too_long}: поле длиннее {FIELD_WIDTH} байт")
+            if len(array):
+                yield array
+            if not block:
+                return
+
+
+def classify_csv(path, column=0, delimiter=",", header=False, chunk_size=1 << 23):
+    """Классификация номеров из CSV по кускам: выдает (коды платежных систем, маска Луна)"""
+    for fields in iter_csv_fields(path, column, delimiter, header, chunk_size):
+        yield classify_batch(fields)
+
+
+def count_issuers(path, **options):
+    """Сводка по файлу: {платежная система: (всего номеров, из них с верной контрольной суммой)}"""
+    total = np.zeros(len(ISSUERS), dtype=np.int64)
+    valid = np.zeros(len(ISSUERS), dtype=np.int64)
+    for issuers, luhn in classify_csv(path, **options):
+        total += np.bincount(issuers, minlength=len(ISSUERS))
+        valid += np.bincount(issuers[luhn], minlength=len(ISSUERS))
+    return {issuer: (int(total[code]), int(valid[code])) for code, issuer in enumerate(ISSUERS)}
+
+
+# =============================================================================
+# ЗАМЕР ПРОИЗВОДИТЕЛЬНОСТИ
+# =============================================================================
+
+def random_numbers(count, seed=0):
+    """Случайные номера карт разных систем и длин (массив байтовых строк)"""
+    rng = np.random.default_rng(seed)
+    prefixes = [b"34", b"37", b"6011", b"51", b"55", b"4", b"4", b"9"]
+    lengths = np.array([15, 15, 16, 16, 16, 16, 13, 16])
+    kind = rng.integers(0, len(prefixes), count)
+    codes = rng.integers(48, 58, (count, MAX_DIGITS), dtype=np.uint8)
+    for index, prefix in enumerate(prefixes):
+        codes[kind == index, :len(prefix)] = np.frombuffer(prefix, dtype=np.uint8)
+    # Байты после конца номера - нулевые (так numpy хранит короткие строки)
+    codes[np.arange(MAX_DIGITS) >= lengths[kind][:, None]] = 0
+    return codes.view(f"S{MAX_DIGITS}").ravel()
+
+
+def benchmark(count=10 ** 6, repeat=3):
+    """Пропускная способность classify_batch: номеров в секунду (лучшая из repeat попыток)"""
+    numbers = random_numbers(count)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        classify_batch(numbers)
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+if __name__ == "__main__":
+    # python script.py                      - пример из задания
+    # python script.py <файл.csv> [столбец] - сводка по файлу
+    # python script.py --benchmark [число]  - замер пропускной способности
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        count = int(float(sys.argv[2])) if len(sys.argv) > 2 else 10 ** 6
+        print(f"{benchmark(count) / 1e6:.2f} млн номеров в секунду")
+    elif len(sys.argv) > 1:
+        column = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+        for issuer, (total, valid) in count_issuers(sys.argv[1], column=column).items():
+            print(f"{issuer}: {total} (контрольная сумма верна: {valid})")
+    else:
+        print(get_issuer(6011783664441608))
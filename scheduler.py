@@ -0,0 +1,120 @@
+"""
+Планирование работы в цикле событий Tk, общее для "2-5.py" и "3 новое":
+RedrawScheduler объединяет запросы перерисовки в один кадр, а
+BackgroundWorker выполняет тяжелые пересчеты в отдельном потоке и
+возвращает результаты в поток Tk.
+"""
+import queue
+import threading
+import time
+import traceback
+from collections import OrderedDict
+
+
+class RedrawScheduler:
+    """
+    Планировщик кадров: обработчики событий лишь помечают сцену измененной,
+    а перерисовка выполняется один раз за кадр - через after_idle, но не чаще
+    чем раз в FRAME_MS миллисекунд. Все изменения между кадрами объединяются.
+    """
+    FRAME_MS = 16
+
+    def __init__(self, widget, redraw):
+        self.widget = widget
+        self.redraw = redraw
+        self.pending = None      # id запланированного вызова after
+        self.last_frame = 0.0    # время последней перерисовки (perf_counter)
+
+    def request(self):
+        """Пометить сцену измененной; перерисовка произойдет в ближайшем кадре"""
+        if self.pending is not None:
+            return
+        wait_ms = int(self.FRAME_MS - (time.perf_counter() - self.last_frame) * 1000)
+        if wait_ms > 0:
+            self.pending = self.widget.after(wait_ms, self.run)
+        else:
+            self.pending = self.widget.after_idle(self.run)
+
+    def run(self):
+        self.pending = None
+        self.last_frame = time.perf_counter()
+        self.redraw()
+
+    def flush(self):
+        """Выполнить запланированную перерисовку немедленно"""
+        if self.pending is not None:
+            self.widget.after_cancel(self.pending)
+            self.run()
+
+
+class BackgroundWorker:
+    """
+    Фоновый поток для тяжелых пересчетов. Задачи с одинаковым ключом схлопываются -
+    выполняется только последняя отправленная. Функция задачи работает с копиями
+    данных и не трогает Tk; ее результат возвращается в поток Tk через очередь,
+    которую опрашивает after(), и там передается в callback. Исключение задачи
+    передается в on_error (тоже в потоке Tk) и не выходит из обработчика after.
+    """
+    POLL_MS = 16
+
+    def __init__(self, widget, on_error=None):
+        self.widget = widget
+        self.on_error = on_error or self.print_error
+        self.jobs = OrderedDict()      # ключ -> (функция, аргументы, callback)
+        self.active = 0
+        self.results = queue.Queue()
+        self.condition = threading.Condition()
+        self.polling = False
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def submit(self, key, function, args, callback):
+        """Поставить задачу в очередь (вызывается из потока Tk)"""
+        with self.condition:
+            self.jobs.pop(key, None)
+            self.jobs[key] = (function, args, callback)
+            self.condition.notify()
+        self.start_polling()
+
+    def work(self):
+        while True:
+            with self.condition:
+                while not self.jobs:
+                    self.condition.wait()
+                _, (function, args, callback) = self.jobs.popitem(last=False)
+                self.active += 1
+            try:
+                self.results.put((callback, function(*args), None))
+            except Exception as error:
+                self.results.put((callback, None, error))
+            finally:
+                with self.condition:
+                    self.active -= 1
+
+    def start_polling(self):
+        if not self.polling:
+            self.polling = True
+            self.widget.after(self.POLL_MS, self.poll)
+
+    def poll(self):
+        """Передать готовые результаты в callback (в потоке Tk)"""
+        self.polling = False
+        with self.condition:
+            busy = bool(self.jobs) or self.active > 0
+        if busy:
+            self.start_polling()
+
+        while True:
+            try:
+                callback, result, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if error is not None:
+                self.on_error(error)
+            else:
+                callback(result)
+
+    @staticmethod
+    def print_error(error):
+        """Обработчик ошибок по умолчанию: трассировка в stderr"""
+        traceback.print_exception(type(error), error, error.__traceback__)
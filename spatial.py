@@ -0,0 +1,118 @@
+"""
+Пространственный индекс для выбора объектов по клику и рамкой и для
+отсечения невидимых объектов: равномерная сетка ячеек. Общий для "1.py"
+и "3 новое".
+
+Пример:
+    grid = SpatialGrid(cell_size=64)
+    grid.insert(shape, shape.get_region())
+    hits = grid.query_point(x, y)
+    top = grid.topmost(hits)
+"""
+
+
+def rects_intersect(a, b):
+    """Пересекаются ли прямоугольники (x0, y0, x1, y1)"""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class SpatialGrid:
+    """
+    Пространственный индекс - равномерная сетка ячеек cell_size x cell_size.
+    Каждый объект регистрируется во всех ячейках, которые покрывает его
+    прямоугольник; слишком большие объекты хранятся отдельным списком.
+    Вставка, обновление и удаление затрагивают только ячейки самого объекта.
+    Для каждого ключа хранится номер добавления (z-порядок): объект,
+    добавленный позже, лежит выше, и обновление прямоугольника номер не меняет.
+    """
+
+    def __init__(self, cell_size=64, max_cells_per_object=1024):
+        self.cell_size = cell_size
+        self.max_cells_per_object = max_cells_per_object
+        self.cells = {}      # (cx, cy) -> множество ключей
+        self.entries = {}    # ключ -> (прямоугольник, список ячеек или None)
+        self.oversized = set()
+        self.order = {}      # ключ -> номер добавления
+        self.next_order = 0
+
+    def cell_bounds(self, bounds):
+        x0, y0, x1, y1 = bounds
+        size = self.cell_size
+        return int(x0 // size), int(y0 // size), int(x1 // size), int(y1 // size)
+
+    def insert(self, key, bounds):
+        """Добавить объект или обновить его прямоугольник"""
+        if key in self.entries:
+            if self.entries[key][0] == bounds:
+                return
+            self.unlink(key)
+        else:
+            self.order[key] = self.next_order
+            self.next_order += 1
+
+        cx0, cy0, cx1, cy1 = self.cell_bounds(bounds)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > self.max_cells_per_object:
+            self.oversized.add(key)
+            self.entries[key] = (bounds, None)
+            return
+
+        cells = [(cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(key)
+        self.entries[key] = (bounds, cells)
+
+    update = insert
+
+    def remove(self, key):
+        """Удалить объект из индекса"""
+        if key in self.entries:
+            self.unlink(key)
+            del self.order[key]
+
+    def unlink(self, key):
+        """Убрать объект из ячеек (номер добавления остается)"""
+        bounds, cells = self.entries.pop(key)
+        if cells is None:
+            self.oversized.discard(key)
+            return
+        for cell in cells:
+            bucket = self.cells[cell]
+            bucket.discard(key)
+            if not bucket:
+                del self.cells[cell]
+
+    def bounds_of(self, key):
+        return self.entries[key][0]
+
+    def topmost(self, keys):
+        """Верхний (добавленный последним) из ключей или None - без поиска по списку объектов"""
+        return max(keys, key=self.order.__getitem__, default=None)
+
+    def query_rect(self, rect):
+        """Все ключи, прямоугольники которых пересекаются с rect = (x0, y0, x1, y1)"""
+        cx0, cy0, cx1, cy1 = self.cell_bounds(rect)
+        candidates = set(self.oversized)
+
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) <= len(self.cells):
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    bucket = self.cells.get((cx, cy))
+                    if bucket:
+                        candidates.update(bucket)
+        else:
+            # Область больше, чем занятых ячеек - быстрее перебрать сами ячейки
+            for (cx, cy), bucket in self.cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    candidates.update(bucket)
+
+        return {key for key in candidates if rects_intersect(self.entries[key][0], rect)}
+
+    def query_point(self, x, y, radius=0):
+        """Ключи, прямоугольники которых находятся не дальше radius от точки (по осям)"""
+        return self.query_rect((x - radius, y - radius, x + radius, y + radius))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
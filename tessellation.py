@@ -0,0 +1,73 @@
+"""
+Адаптивное разбиение кубических кривых Безье на ломаные с допуском в
+пикселях - общее для сплайнов Безье ("3 новое") и Катмулла-Рома ("2-5.py"),
+которые переводят свои сегменты в кубические кривые Безье.
+
+Пример:
+    quads = np.array([[(0, 0), (30, 80), (70, 80), (100, 0)]])
+    vertices = flatten_cubic_bezier(quads, tolerance=0.5)[0]
+"""
+import numpy as np
+
+
+def flatten_cubic_bezier(quads, tolerance=0.5, max_depth=12):
+    """
+    Адаптивное разбиение кубических кривых Безье на ломаные: рекурсивное деление
+    де Кастельжо пополам, пока кусок не станет "плоским" с точностью tolerance.
+    Рекурсия выполняется по уровням сразу для всех кусков всех сегментов.
+    quads - массив (k, 4, 2) контрольных точек сегментов. Почти прямой сегмент
+    дает две вершины, крутой изгиб - столько, сколько нужно для точности.
+    Возвращает список из k массивов (m_i, 2) - вершины каждого сегмента с концами.
+    """
+    quads = np.asarray(quads, dtype=np.float64).reshape(-1, 4, 2)
+    count = len(quads)
+    limit = tolerance * tolerance
+
+    # Концы сегментов - вершины с параметром t = 1
+    owners = [np.arange(count)]
+    starts = [np.ones(count)]
+    vertices = [quads[:, 3]]
+
+    pieces = quads
+    piece_owners = np.arange(count)
+    piece_starts = np.zeros(count)  # параметр начала куска в исходном сегменте
+    for depth in range(max_depth + 1):
+        # Кусок лежит в выпуклой оболочке своих контрольных точек, поэтому если P1 и P2
+        # ближе tolerance к хорде P0-P3, то и вся кривая отклоняется от хорды не больше
+        chord = pieces[:, 3] - pieces[:, 0]
+        chord_length = np.maximum((chord * chord).sum(axis=1), 1e-12)[:, None]
+        deviation = np.zeros(len(pieces))
+        for inner in (pieces[:, 1], pieces[:, 2]):
+            offset = inner - pieces[:, 0]
+            t = np.clip((offset * chord).sum(axis=1, keepdims=True) / chord_length, 0.0, 1.0)
+            deviation = np.maximum(deviation, ((offset - t * chord) ** 2).sum(axis=1))
+        flat = deviation <= limit
+        if depth == max_depth:
+            flat[:] = True
+
+        # Плоский кусок заменяется отрезком - сохраняем его начальную вершину
+        owners.append(piece_owners[flat])
+        starts.append(piece_starts[flat])
+        vertices.append(pieces[flat, 0])
+
+        rest = ~flat
+        if not rest.any():
+            break
+        p0, p1, p2, p3 = pieces[rest].transpose(1, 0, 2)
+        piece_owners = piece_owners[rest]
+        piece_starts = piece_starts[rest]
+
+        # Деление пополам по схеме де Кастельжо
+        p01, p12, p23 = (p0 + p1) / 2, (p1 + p2) / 2, (p2 + p3) / 2
+        p012, p123 = (p01 + p12) / 2, (p12 + p23) / 2
+        middle = (p012 + p123) / 2
+        pieces = np.concatenate([np.stack([p0, p01, p012, middle], axis=1),
+                                 np.stack([middle, p123, p23, p3], axis=1)])
+        piece_owners = np.concatenate([piece_owners, piece_owners])
+        piece_starts = np.concatenate([piece_starts, piece_starts + 0.5 ** (depth + 1)])
+
+    owners = np.concatenate(owners)
+    order = np.lexsort((np.concatenate(starts), owners))
+    vertices = np.concatenate(vertices)[order]
+    counts = np.bincount(owners, minlength=count)
+    return np.split(vertices, np.cumsum(counts)[:-1]) if count else []
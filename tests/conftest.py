@@ -0,0 +1,41 @@
+"""
+Общие настройки тестов. Модули репозитория лежат в корне и в pythonProject,
+а скрипты "3 новое" и "18" не имеют расширения .py - они загружаются как
+модули через SourceFileLoader.
+"""
+import importlib.machinery
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (ROOT, os.path.join(ROOT, "pythonProject")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def load_script(name, filename):
+    """Загрузить скрипт репозитория как модуль (один раз за сеанс тестов)"""
+    if name in sys.modules:
+        return sys.modules[name]
+    loader = importlib.machinery.SourceFileLoader(name, os.path.join(ROOT, filename))
+    spec = importlib.util.spec_from_loader(name, loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def scene_lab():
+    """Лабораторная "3 новое" (полигоны, сплайны, файл сцены)"""
+    return load_script("scene_lab", "3 новое")
+
+
+@pytest.fixture(scope="session")
+def solver18():
+    """Скрипт "18" (решатель уравнений вида x = g(x))"""
+    return load_script("solver18", "18")
@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from arclength import ArcLengthTable
+
+
+def bezier(quads, t):
+    """Точки сегментов (k, 4, 2) при параметрах t (m,) - массив (k, m, 2)"""
+    t = np.asarray(t)[None, :, None]
+    p0, p1, p2, p3 = (quads[:, i, None] for i in range(4))
+    return (1 - t) ** 3 * p0 + 3 * (1 - t) ** 2 * t * p1 + 3 * (1 - t) * t ** 2 * p2 + t ** 3 * p3
+
+
+def dense_polyline(quads, samples=20000):
+    return bezier(quads, np.linspace(0.0, 1.0, samples)).reshape(-1, 2)
+
+
+def polyline_length(points):
+    return np.hypot(*np.diff(points, axis=0).T).sum()
+
+
+def random_quads(rng, count):
+    # Гладкая составная кривая через случайные точки (сегменты Катмулла-Рома в форме Безье)
+    points = rng.uniform(0, 500, (count + 3, 2))
+    p0, p1, p2, p3 = points[:-3], points[1:-2], points[2:-1], points[3:]
+    return np.stack([p1, p1 + (p2 - p0) / 6, p2 - (p3 - p1) / 6, p2], axis=1)
+
+
+@pytest.fixture
+def quads():
+    return random_quads(np.random.default_rng(0), 6)
+
+
+def test_length_matches_dense_sampling(quads):
+    table = ArcLengthTable(quads)
+    assert table.length == pytest.approx(polyline_length(dense_polyline(quads)), rel=1e-6)
+    # До середины третьего сегмента: два целых сегмента и половина третьего
+    partial = np.concatenate([dense_polyline(quads[:2]), bezier(quads[2:3], np.linspace(0.0, 0.5, 20000))[0]])
+    assert table.length_at(2.5) == pytest.approx(polyline_length(partial), rel=1e-6)
+    assert table.length_at(table.segment_count) == pytest.approx(table.length)
+
+
+def test_length_of_straight_segment():
+    straight = np.array([[[0, 0], [10, 10], [20, 20], [30, 30]]], dtype=float)
+    assert ArcLengthTable(straight).length == pytest.approx(30 * np.sqrt(2))
+
+
+def test_parameter_at_inverts_length_at(quads):
+    table = ArcLengthTable(quads)
+    distances = np.linspace(0.0, table.length, 101)
+    np.testing.assert_allclose(table.length_at(table.parameter_at(distances)), distances, atol=1e-6)
+
+
+def test_resample_spacing(quads):
+    table = ArcLengthTable(quads)
+    points = table.resample(spacing=5.0)
+    assert len(points) == int(table.length // 5.0) + 1
+    np.testing.assert_allclose(points[0], quads[0, 0])
+    # Хорда не длиннее дуги, а на гладкой кривой почти равна ей
+    chords = np.hypot(*np.diff(points, axis=0).T)
+    assert np.all(chords <= 5.0 + 1e-6)
+    assert np.median(chords) == pytest.approx(5.0, abs=1e-3)
+
+    ends = table.resample(count=7)
+    assert len(ends) == 7
+    np.testing.assert_allclose(ends[[0, -1]], [quads[0, 0], quads[-1, 3]], atol=1e-9)
+
+
+@pytest.mark.parametrize("spacing", [0.0, -1.0])
+def test_resample_rejects_non_positive_spacing(quads, spacing):
+    with pytest.raises(ValueError):
+        ArcLengthTable(quads).resample(spacing=spacing)
+
+
+def test_closest_point_matches_brute_force(quads):
+    table = ArcLengthTable(quads)
+    dense = dense_polyline(quads, 100000)
+    rng = np.random.default_rng(1)
+    for x, y in rng.uniform(-50, 550, (50, 2)):
+        point, parameter, distance = table.closest_point(x, y)
+        expected = np.hypot(*(dense - (x, y)).T).min()
+        assert distance == pytest.approx(expected, abs=1e-3)
+        np.testing.assert_allclose(table.point_at(parameter), point)
+
+
+def test_previous_table_gives_same_result():
+    rng = np.random.default_rng(2)
+    quads = random_quads(rng, 12)
+    full = ArcLengthTable(quads)
+    for previous_quads in (quads[:8], quads, random_quads(rng, 12)):
+        previous = ArcLengthTable(previous_quads)
+        table = ArcLengthTable(quads, previous=previous)
+        np.testing.assert_allclose(table.distances, full.distances, rtol=1e-12, atol=1e-9)
+        np.testing.assert_allclose(table.points, full.points, atol=1e-9)
+    # Укороченная кривая - целиком из прежней таблицы
+    shorter = ArcLengthTable(quads[:5], previous=full)
+    assert shorter.shared_segments(full) == 5
+    np.testing.assert_allclose(shorter.distances, full.distances[:5 * full.samples + 1])
+
+
+def test_shared_segments():
+    quads = random_quads(np.random.default_rng(3), 5)
+    previous = ArcLengthTable(quads)
+    changed = quads.copy()
+    changed[3, 2] += 1
+    assert ArcLengthTable(changed, previous=previous).shared_segments(previous) == 3
+    assert ArcLengthTable(quads, samples=8).shared_segments(previous) == 0
+    assert ArcLengthTable(quads).shared_segments(None) == 0
+
+
+def test_empty_curve():
+    with pytest.raises(ValueError):
+        ArcLengthTable(np.empty((0, 4, 2)))
+
+
+def test_spline_table_follows_edits(scene_lab):
+    spline = scene_lab.SplineCurve()
+    assert spline.curve_length() == 0.0
+    assert spline.closest_point(0, 0) is None
+    spline.add_control_point(scene_lab.Point(10, 10))
+    assert spline.arc_length_table() is None
+    for x, y in [(60, 80), (120, 20), (180, 90), (240, 30)]:
+        spline.add_control_point(scene_lab.Point(x, y))
+        table = spline.arc_length_table()
+        assert spline.curve_length() == pytest.approx(ArcLengthTable(spline.curve_quads()).length, rel=1e-12)
+        assert spline.arc_length_table() is table
+
+    spline.set_tension(0.8)
+    assert spline.curve_length() == pytest.approx(ArcLengthTable(spline.curve_quads()).length, rel=1e-12)
+    point, _, distance = spline.closest_point(120, 20)
+    assert distance == pytest.approx(0, abs=1e-6)
+    assert (point.x, point.y) == pytest.approx((120, 20))
@@ -0,0 +1,105 @@
+import io
+import random
+
+import pytest
+
+from main import BracketResult, is_valid_brackets, validate_brackets_file, validate_brackets_stream
+
+PAIRS = {b")": b"(", b"]": b"[", b"}": b"{"}
+
+
+def reference(data, policy):
+    """Посимвольная проверка со стеком: BracketResult с первой ошибкой"""
+    stack = []
+    for offset in range(len(data)):
+        char = data[offset:offset + 1]
+        if char in b"([{":
+            stack.append((offset, char))
+        elif char in PAIRS:
+            if not stack:
+                return BracketResult(False, offset, "unexpected")
+            if stack.pop()[1] != PAIRS[char]:
+                return BracketResult(False, offset, "mismatch")
+        elif policy == "strict" or (policy == "whitespace" and not char.isspace()):
+            return BracketResult(False, offset, "invalid")
+    if stack:
+        return BracketResult(False, stack[0][0], "unclosed")
+    return BracketResult(True)
+
+
+def random_text(rng, length):
+    # Вложенная правильная основа с редкими порчами и посторонними символами
+    text, stack = [], []
+    for _ in range(length):
+        roll = rng.random()
+        if roll < 0.45 or not stack:
+            opening = rng.choice(b"([{")
+            stack.append(opening)
+            text.append(opening)
+        elif roll < 0.985:
+            text.append(b")]}"[b"([{".index(stack.pop())])
+        else:
+            text.append(rng.choice(b" \nx)]}([{"))
+    if rng.random() < 0.5:
+        text += [b")]}"[b"([{".index(opening)] for opening in reversed(stack)]
+    return bytes(text)
+
+
+def as_tuple(result):
+    return result.valid, result.offset, result.reason
+
+
+def test_is_valid_brackets():
+    assert is_valid_brackets("([]{()})")
+    assert is_valid_brackets("")
+    assert not is_valid_brackets("(]")
+    assert not is_valid_brackets("(()")
+    assert not is_valid_brackets("())")
+    assert not is_valid_brackets("(a)")
+
+
+@pytest.mark.parametrize("policy", ["skip", "whitespace", "strict"])
+def test_stream_matches_reference(policy):
+    rng = random.Random(policy)
+    for _ in range(300):
+        data = random_text(rng, rng.randrange(0, 200))
+        chunk_size = rng.randrange(1, 40)
+        result = validate_brackets_stream(io.BytesIO(data), chunk_size, policy)
+        assert as_tuple(result) == as_tuple(reference(data, policy)), (data, chunk_size)
+
+
+@pytest.mark.parametrize("data, chunk_size, expected", [
+    (b"(" * 5 + b")" * 5, 3, (True, None, None)),
+    (b"((((]", 2, (False, 4, "mismatch")),
+    (b"()())", 2, (False, 4, "unexpected")),
+    (b"[[()", 1, (False, 0, "unclosed")),
+    (b"(x)", 1, (False, 1, "invalid")),
+])
+def test_errors_across_chunk_boundaries(data, chunk_size, expected):
+    assert as_tuple(validate_brackets_stream(io.BytesIO(data), chunk_size, "strict")) == expected
+
+
+def test_deep_nesting_spans_many_chunks():
+    depth = 100000
+    data = b"([{" * depth + b"}])" * depth
+    assert validate_brackets_stream(io.BytesIO(data), 4096)
+    broken = bytearray(data)
+    broken[3 * depth + 10] = ord(")")
+    result = validate_brackets_stream(io.BytesIO(bytes(broken)), 4096)
+    assert as_tuple(result) == (False, 3 * depth + 10, "mismatch")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_file_validation(tmp_path, workers):
+    rng = random.Random(workers)
+    path = tmp_path / "brackets.txt"
+    for _ in range(5):
+        data = random_text(rng, 5000)
+        path.write_bytes(data)
+        result = validate_brackets_file(str(path), chunk_size=512, workers=workers)
+        assert as_tuple(result) == as_tuple(reference(data, "skip"))
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        validate_brackets_stream(io.BytesIO(b"()"), policy="loose")
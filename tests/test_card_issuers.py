@@ -0,0 +1,87 @@
+import random
+
+import numpy as np
+import pytest
+
+from script import (ISSUERS, IssuerTable, classify_batch, count_issuers, digit_matrix, get_issuer,
+                    iter_csv_fields, luhn_valid)
+
+
+def reference_luhn(number):
+    """Алгоритм Луна по строке цифр"""
+    total = 0
+    for index, char in enumerate(reversed(number)):
+        digit = int(char)
+        if index % 2:
+            digit = digit * 2 - 9 if digit > 4 else digit * 2
+        total += digit
+    return total % 10 == 0
+
+
+@pytest.mark.parametrize("number, issuer", [
+    (6011783664441608, "Discover"),
+    (378282246310005, "AMEX"),
+    (341111111111111, "AMEX"),
+    (5105105105105100, "Mastercard"),
+    (4111111111111111, "VISA"),
+    (4222222222222, "VISA"),
+    ("4111-1111 1111-1111", "VISA"),
+    # Префикс сравнивается с началом номера, а не ищется внутри
+    (1234601112345678, "Unknown"),
+    (5600000000000000, "Unknown"),
+    # Длина номера не подходит под правило
+    (601178366444160, "Unknown"),
+    (41111111111111, "Unknown"),
+    ("", "Unknown"),
+])
+def test_get_issuer(number, issuer):
+    assert get_issuer(number) == issuer
+
+
+def test_longer_prefix_takes_precedence():
+    table = IssuerTable([("60", (16,), "VISA"), ("6011", (16,), "Discover"), ("6", (16,), "AMEX")])
+    assert table.lookup("6011000000000000") == "Discover"
+    assert table.lookup("6022000000000000") == "VISA"
+    assert table.lookup("6900000000000000") == "AMEX"
+
+
+def test_luhn_matches_reference():
+    rng = random.Random(0)
+    numbers = ["".join(rng.choice("0123456789") for _ in range(rng.randrange(1, 20))) for _ in range(2000)]
+    digits, lengths = digit_matrix(np.array(numbers, dtype="S32"))
+    expected = [reference_luhn(number) for number in numbers]
+    np.testing.assert_array_equal(luhn_valid(digits, lengths), expected)
+    assert not luhn_valid(*digit_matrix(np.array([b""])))[0]
+
+
+def test_classify_batch_ignores_separators():
+    fields = ["6011111111111117", "6011-1111 1111-1117", " 4111 1111 1111 1111", "378282246310005",
+              "4111111111111112", "12345678901234567890"]
+    issuers, luhn = classify_batch(fields)
+    assert [ISSUERS[code] for code in issuers] == ["Discover", "Discover", "VISA", "AMEX", "VISA", "Unknown"]
+    assert list(luhn) == [True, True, True, True, False, False]
+
+
+def test_iter_csv_fields_skips_blank_and_short_rows(tmp_path):
+    path = tmp_path / "cards.csv"
+    path.write_bytes(b"name,number\n\nann,4111111111111111\r\nshort\n  \nbob,378282246310005\nlast")
+    for column, expected in [(0, [b"ann", b"short", b"bob", b"last"]),
+                             (1, [b"4111111111111111", b"378282246310005"])]:
+        for chunk_size in (1, 7, 1 << 20):
+            chunks = list(iter_csv_fields(str(path), column, header=True, chunk_size=chunk_size))
+            assert all(len(chunk) for chunk in chunks)
+            assert [field for chunk in chunks for field in chunk] == expected
+
+
+def test_iter_csv_fields_rejects_long_fields(tmp_path):
+    path = tmp_path / "cards.csv"
+    path.write_bytes(b"x,4111111111111111\n\nx," + b"4" * 40 + b"\n")
+    with pytest.raises(ValueError, match="строка 3"):
+        list(iter_csv_fields(str(path), column=1))
+
+
+def test_count_issuers(tmp_path):
+    path = tmp_path / "cards.csv"
+    path.write_text("number\n6011111111111117\n4111111111111111\n4111111111111112\n\n12345\n")
+    counts = count_issuers(str(path), header=True, chunk_size=16)
+    assert counts == {"Unknown": (1, 0), "AMEX": (0, 0), "Discover": (1, 1), "Mastercard": (0, 0), "VISA": (2, 1)}
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("method", ["plain", "aitken", "anderson"])
+def test_equation_converges_to_fixed_point(solver18, method):
+    t = np.linspace(-1, 1, 501)
+    result = solver18.solve_fixed_point(solver18.equation_rhs, t, tol=1e-10, max_iter=200, method=method)
+    assert result.all_converged
+    np.testing.assert_allclose(solver18.equation_rhs(result.x, t), result.x, atol=1e-9)
+    assert result.max_residual <= 1e-10
+
+
+def test_acceleration_needs_fewer_evaluations(solver18):
+    t = np.linspace(-1, 1, 1001)
+    plain = solver18.solve_fixed_point(solver18.equation_rhs, t, method="plain", max_iter=500)
+    anderson = solver18.solve_fixed_point(solver18.equation_rhs, t, method="anderson", max_iter=500)
+    np.testing.assert_allclose(anderson.x, plain.x, atol=1e-7)
+    assert anderson.evaluations < plain.evaluations
+
+
+def test_unconverged_residual_matches_returned_x(solver18):
+    # g(x) = 2x + 1 расходится: 0, 1, 3, 7, 15, 31
+    result = solver18.solve_fixed_point(lambda x, t: 2 * x + 1, np.zeros(3), max_iter=5, method="plain")
+    assert not result.converged.any()
+    np.testing.assert_array_equal(result.x, 31)
+    np.testing.assert_array_equal(result.residual, 32)
+    np.testing.assert_array_equal(result.iterations, 5)
+
+
+def test_mixed_convergence_masks_points(solver18):
+    # При t = 0 отображение сжимающее, при t = 1 - нет (x = 3x + 1)
+    t = np.array([0.0, 1.0])
+    result = solver18.solve_fixed_point(lambda x, t: (0.5 + 2.5 * t) * x + 1, t, max_iter=50, method="plain")
+    assert result.converged.tolist() == [True, False]
+    assert abs(result.x[0] - 2) <= 1e-7
+    assert result.iterations.tolist()[1] == 50
+    assert result.residual[1] == abs(3 * result.x[1] + 1 - result.x[1])
+
+
+@pytest.mark.parametrize("method", ["plain", "aitken", "anderson"])
+def test_converged_residual_matches_returned_x(solver18, method):
+    t = np.linspace(0, 0.4, 7)
+    rhs = lambda x, t: (0.5 + t) * x + 1
+    result = solver18.solve_fixed_point(rhs, t, tol=1e-3, method=method)
+    assert result.all_converged
+    np.testing.assert_array_equal(result.residual, np.abs(rhs(result.x, t) - result.x))
+    assert result.max_residual <= 1e-3
+
+
+def test_stream_matches_single_solve(solver18):
+    summary, _, _ = solver18.solve_equation_stream(10001, chunk_size=1000)
+    whole = solver18.solve_equation(10001)
+    assert summary["min"] == whole.x.min() and summary["max"] == whole.x.max()
+    assert summary["not_converged"] == 0
+    assert summary["evaluations"] == whole.evaluations
@@ -0,0 +1,17 @@
+import numpy as np
+
+
+def test_fill_follows_bitmap_changes(scene_lab):
+    bitmap = scene_lab.BitmapResource(4, 4)
+    brush = scene_lab.PatternBrush(bitmap)
+    coords = [(0, 0), (20, 0), (20, 20), (0, 20)]
+
+    image, origin = brush.render_polygon_fill(coords)
+    assert brush.render_polygon_fill(coords)[0] is image
+
+    # После изменения узора заливка строится заново, а не берется из кэша
+    bitmap.pixels[...] = (10, 20, 30, 255)
+    bitmap.invalidate()
+    changed, changed_origin = brush.render_polygon_fill(coords)
+    assert changed is not image and changed_origin == origin
+    np.testing.assert_array_equal(np.asarray(changed)[5, 5], [10, 20, 30, 255])
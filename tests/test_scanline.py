@@ -0,0 +1,92 @@
+import random
+
+import numpy as np
+import pytest
+
+from scanline import SpanList, scanline_spans
+
+
+def reference_mask(coords, rule, width, height):
+    """Маска по центрам пикселей: луч вправо из центра и подсчет пересечений с ребрами"""
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    ys, xs = np.mgrid[0:height, 0:width] + 0.5
+    winding = np.zeros((height, width), dtype=np.int64)
+    for (x0, y0), (x1, y1) in zip(coords, np.roll(coords, -1, axis=0)):
+        if y0 == y1:
+            continue
+        # Полуинтервал [верх, низ): общая вершина двух ребер учитывается один раз
+        crosses = (np.minimum(y0, y1) <= ys) & (ys < np.maximum(y0, y1))
+        x = x0 + (ys - y0) * (x1 - x0) / (y1 - y0)
+        winding += np.where(crosses & (x > xs), 1 if y1 > y0 else -1, 0)
+    if rule == "evenodd":
+        return winding % 2 == 1
+    return winding != 0
+
+
+def random_polygon(rng, count, size):
+    # Случайные вещественные вершины: центр пикселя практически никогда не лежит на ребре
+    return [(rng.uniform(0, size), rng.uniform(0, size)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("rule", ["evenodd", "nonzero"])
+def test_spans_match_pixel_centers(rule):
+    rng = random.Random(rule)
+    size = 40
+    for _ in range(200):
+        coords = random_polygon(rng, rng.randrange(3, 12), size)
+        spans = scanline_spans(coords, rule)
+        mask = spans.coverage(0, 0, size, size)
+        np.testing.assert_array_equal(mask, reference_mask(coords, rule, size, size), err_msg=str(coords))
+        assert spans.pixel_count() == mask.sum()
+        # Отрезки упорядочены по строкам и x и не пересекаются
+        order = np.lexsort((spans.x0, spans.y))
+        np.testing.assert_array_equal(order, np.arange(len(spans)))
+        same_row = spans.y[1:] == spans.y[:-1]
+        assert (spans.x0[1:][same_row] >= spans.x1[:-1][same_row]).all()
+
+
+def test_rules_differ_on_self_overlap():
+    # Пятиконечная звезда: центр внутри по nonzero и снаружи по evenodd
+    star = [(50 + 40 * np.sin(a), 50 - 40 * np.cos(a)) for a in np.arange(5) * 4 * np.pi / 5]
+    assert scanline_spans(star, "nonzero").coverage(0, 0, 100, 100)[50, 50]
+    assert not scanline_spans(star, "evenodd").coverage(0, 0, 100, 100)[50, 50]
+
+
+def test_fill_mask_and_bounds():
+    square = [2, 1, 6, 1, 6, 4, 2, 4]
+    spans = scanline_spans(square)
+    assert spans.bounds() == (2, 1, 6, 4)
+    assert spans.pixel_count() == 12
+
+    framebuffer = np.zeros((3, 5, 3), dtype=np.uint8)
+    spans.fill(framebuffer, (255, 0, 0), origin=(3, 2))
+    expected = np.zeros((3, 5), dtype=bool)
+    expected[0:2, 0:3] = True
+    np.testing.assert_array_equal(framebuffer[..., 0] == 255, expected)
+    assert not framebuffer[..., 1:].any()
+
+    mask = spans.mask(8, 6)
+    assert mask.dtype == np.uint8
+    assert set(np.unique(mask)) == {0, 255}
+    np.testing.assert_array_equal(mask == 255, reference_mask(square, "evenodd", 8, 6))
+
+
+def test_clipped():
+    spans = scanline_spans([0, 0, 10, 0, 10, 10, 0, 10]).clipped(3, 2, 20, 5)
+    assert spans.bounds() == (3, 2, 10, 5)
+    assert spans.pixel_count() == 3 * 7
+    assert len(spans.clipped(20, 20, 30, 30)) == 0
+
+
+def test_degenerate_input():
+    assert len(scanline_spans([])) == 0
+    assert len(scanline_spans([0, 0, 5, 5])) == 0
+    assert len(scanline_spans([0, 0, 5, 0, 9, 0])) == 0
+    empty = SpanList.empty()
+    assert empty.bounds() == (0, 0, 0, 0)
+    assert not empty.coverage(0, 0, 4, 4).any()
+
+
+def test_unknown_rule():
+    with pytest.raises(ValueError):
+        scanline_spans([0, 0, 5, 0, 0, 5], rule="winding")
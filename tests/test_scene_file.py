@@ -0,0 +1,132 @@
+import numpy as np
+
+
+def make_scene(lab):
+    polygons = [lab.Polygon([lab.Point(0, 0), lab.Point(40, 0), lab.Point(20, 30)], "red", "blue"),
+                lab.Polygon([lab.Point(100, 100), lab.Point(150, 120), lab.Point(120, 160)])]
+    manager = lab.SplineManager()
+    for offset in (0, 200):
+        manager.start_new_spline()
+        for x, y in [(10, 10), (60, 80), (120, 20), (180, 90)]:
+            manager.get_current_spline().add_control_point(lab.Point(x + offset, y))
+        manager.finish_current_spline()
+    manager.start_new_spline()
+    manager.get_current_spline().add_control_point(lab.Point(5, 5))
+    bitmap = lab.BitmapResource(8, 4)
+    bitmap.pixels[1, 2] = (1, 2, 3, 4)
+    return polygons, manager, [bitmap]
+
+
+def test_round_trip(scene_lab, tmp_path):
+    polygons, manager, bitmaps = make_scene(scene_lab)
+    manager.splines[1].set_tension(0.7)
+    scene_file = scene_lab.SceneFile(str(tmp_path / "a.scene"))
+    scene_file.save(polygons, manager, bitmaps)
+
+    loaded_polygons, loaded_manager, loaded_bitmaps = scene_lab.SceneFile(str(tmp_path / "a.scene")).load()
+    assert [(p.color, p.fill_color) for p in loaded_polygons] == [("red", "blue"), ("black", None)]
+    for original, loaded in zip(polygons, loaded_polygons):
+        np.testing.assert_array_equal(loaded.points.array(), original.points.array())
+    assert len(loaded_manager.splines) == 2
+    assert loaded_manager.splines[1].tension == 0.7
+    np.testing.assert_array_equal(loaded_manager.splines[0].control_array(), manager.splines[0].control_array())
+    np.testing.assert_array_equal(loaded_manager.get_current_spline().control_array(), [[5, 5]])
+    np.testing.assert_array_equal(loaded_bitmaps[0].to_array(), bitmaps[0].to_array())
+
+
+def test_save_appends_only_changes(scene_lab, tmp_path):
+    polygons, manager, bitmaps = make_scene(scene_lab)
+    scene_file = scene_lab.SceneFile(str(tmp_path / "a.scene"))
+    assert scene_file.save(polygons, manager, bitmaps) > 0
+    assert scene_file.save(polygons, manager, bitmaps) == 0
+
+    # Масштаб и детализация меняют ревизию отрисовки, но не сохраняемое состояние
+    for spline in manager.splines:
+        spline.set_view(2.5, scene_lab.Viewport.OUTLINE)
+    assert scene_file.save(polygons, manager, bitmaps) == 0
+
+    manager.splines[0].add_control_point(scene_lab.Point(300, 300))
+    size = scene_file.save(polygons, manager, bitmaps)
+    assert 0 < size < (tmp_path / "a.scene").stat().st_size
+
+    _, loaded_manager, _ = scene_lab.SceneFile(str(tmp_path / "a.scene")).load()
+    assert loaded_manager.splines[0].get_point_count() == 5
+
+
+def test_drop_and_reload_continues_appending(scene_lab, tmp_path):
+    path = str(tmp_path / "a.scene")
+    polygons, manager, bitmaps = make_scene(scene_lab)
+    scene_lab.SceneFile(path).save(polygons, manager, bitmaps)
+
+    scene_file = scene_lab.SceneFile(path)
+    loaded_polygons, loaded_manager, loaded_bitmaps = scene_file.load()
+    assert scene_file.save(loaded_polygons, loaded_manager, loaded_bitmaps) == 0
+    scene_file.save(loaded_polygons[1:], loaded_manager, loaded_bitmaps)
+
+    reloaded_polygons, _, _ = scene_lab.SceneFile(path).load()
+    assert [p.color for p in reloaded_polygons] == ["black"]
+
+
+def test_compaction_rewrites_stale_records(scene_lab, tmp_path):
+    path = tmp_path / "a.scene"
+    polygons, manager, bitmaps = make_scene(scene_lab)
+    scene_file = scene_lab.SceneFile(str(path))
+    scene_file.COMPACT_MIN_SIZE = 0
+    scene_file.save(polygons, manager, bitmaps)
+    full_size = path.stat().st_size
+
+    # Каждое сохранение дописывает новую запись полигона, пока устаревшие не займут больше половины
+    sizes = []
+    for step in range(20):
+        polygons[0].set_vertices(polygons[0].points.array() + 1)
+        scene_file.save(polygons, manager, bitmaps)
+        sizes.append(path.stat().st_size)
+    assert max(sizes) <= 2 * full_size + 512
+    assert min(sizes[1:]) <= full_size
+
+    loaded_polygons, _, _ = scene_lab.SceneFile(str(path)).load()
+    np.testing.assert_array_equal(loaded_polygons[0].points.array(), polygons[0].points.array())
+
+
+def test_truncated_record_is_ignored(scene_lab, tmp_path):
+    path = tmp_path / "a.scene"
+    polygons, manager, bitmaps = make_scene(scene_lab)
+    scene_file = scene_lab.SceneFile(str(path))
+    scene_file.save(polygons, manager, bitmaps)
+    complete_size = path.stat().st_size
+    polygons[1].set_vertices(polygons[1].points.array() * 2)
+    scene_file.save(polygons, manager, bitmaps)
+
+    # Сбой во время дописывания: последняя запись оборвана
+    with open(path, "r+b") as file:
+        file.truncate(path.stat().st_size - 8)
+    loaded_polygons, _, _ = scene_lab.SceneFile(str(path)).load()
+    assert path.stat().st_size == complete_size
+    np.testing.assert_array_equal(loaded_polygons[1].points.array(), [[100, 100], [150, 120], [120, 160]])
+
+
+def test_compaction_after_load_detaches_mapping(scene_lab, tmp_path):
+    path = str(tmp_path / "a.scene")
+    polygons, manager, bitmaps = make_scene(scene_lab)
+    scene_lab.SceneFile(path).save(polygons, manager, bitmaps)
+
+    scene_file = scene_lab.SceneFile(path)
+    scene_file.COMPACT_MIN_SIZE = 0
+    loaded_polygons, loaded_manager, loaded_bitmaps = scene_file.load()
+    assert scene_file.mmap is not None
+
+    # Правки дописываются, пока устаревшие записи не вызовут перезапись файла
+    for step in range(20):
+        loaded_polygons[0].set_vertices(loaded_polygons[0].points.array() + 1)
+        loaded_bitmaps[0].pixels[0, 0] = (step, 0, 0, 255)
+        loaded_bitmaps[0].invalidate()
+        scene_file.save(loaded_polygons, loaded_manager, loaded_bitmaps)
+    assert scene_file.mmap is None
+
+    # Объекты продолжают работать на собственной памяти, файл согласован с ними
+    loaded_manager.splines[0].add_control_point(scene_lab.Point(300, 300))
+    scene_file.save(loaded_polygons, loaded_manager, loaded_bitmaps)
+    reloaded_polygons, reloaded_manager, reloaded_bitmaps = scene_lab.SceneFile(path).load()
+    np.testing.assert_array_equal(reloaded_polygons[0].points.array(), polygons[0].points.array() + 20)
+    np.testing.assert_array_equal(reloaded_bitmaps[0].pixels[0, 0], [19, 0, 0, 255])
+    assert reloaded_manager.splines[0].get_point_count() == 5